@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for Round 1A heading classification
+Compares the legacy per-span classifier with the batch classifier (spans/second)
+"""
+
+import argparse
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+import fitz  # PyMuPDF
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "round_1a"))
+
+from pdf_structure_extractor import FontStatistics, PDFStructureExtractor  # noqa: E402
+
+def legacy_is_likely_heading(extractor: PDFStructureExtractor, element: Dict,
+                             avg_font_size: float, common_font_size: float) -> bool:
+    """Per-span classifier as it was before the batch API"""
+    text = element["text"]
+    font_size = element["font_size"]
+    
+    if len(text) > extractor.max_heading_length:
+        return False
+    if font_size < extractor.min_heading_size:
+        return False
+    
+    size_threshold = max(avg_font_size + extractor.font_size_threshold, common_font_size + 1.0)
+    if font_size >= size_threshold:
+        return True
+    if element["font_flags"] & 2**4:
+        return True
+    
+    heading_patterns = [
+        r'^\d+\.?\s+[A-Z]',
+        r'^[A-Z][A-Z\s]+$',
+        r'^[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*$',
+        r'^(Chapter|Section|Part)\s+\d+',
+        r'^\d+\.\d+\s+',
+    ]
+    for pattern in heading_patterns:
+        if re.match(pattern, text):
+            return True
+    return False
+
+def legacy_classify_heading_level(font_size: float, font_size_levels: List[float]) -> str:
+    """Per-heading level lookup as it was before the batch API (re-sorts every call)"""
+    sorted_sizes = sorted(font_size_levels, reverse=True)
+    if len(sorted_sizes) == 1:
+        return "H1"
+    elif len(sorted_sizes) == 2:
+        return "H1" if font_size == sorted_sizes[0] else "H2"
+    if font_size == sorted_sizes[0]:
+        return "H1"
+    elif font_size == sorted_sizes[1]:
+        return "H2"
+    return "H3"
+
+def legacy_classify(extractor: PDFStructureExtractor, elements: List[Dict]) -> List[str]:
+    font_sizes = [e["font_size"] for e in elements]
+    avg_font_size = np.mean(font_sizes)
+    common_font_size = Counter(font_sizes).most_common(1)[0][0]
+    headings = [e for e in elements if legacy_is_likely_heading(extractor, e, avg_font_size, common_font_size)]
+    levels_in = list(set(h["font_size"] for h in headings))
+    return [legacy_classify_heading_level(h["font_size"], levels_in) for h in headings]
+
+def batch_classify(extractor: PDFStructureExtractor, spans) -> List[str]:
+    stats = FontStatistics()
+    stats.update(spans.size)
+    headings = np.flatnonzero(extractor.heading_mask(spans, stats.mean, stats.most_common))
+    return extractor.heading_levels(spans.size[headings])
+
+def spans_per_second(fn, payload, n_spans: int, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    return n_spans * repeat / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", default=str(REPO_ROOT / "round_1a" / "input_round1a"))
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    
+    extractor = PDFStructureExtractor()
+    
+    for pdf_file in sorted(Path(args.input).glob("*.pdf")):
+        with fitz.open(str(pdf_file)) as doc:
+            spans = extractor.extract_text_with_properties(doc)
+        elements = [spans[i] for i in range(len(spans))]
+        
+        # Both paths must agree before their speed is worth comparing
+        assert legacy_classify(extractor, elements) == batch_classify(extractor, spans)
+        
+        before = spans_per_second(lambda e: legacy_classify(extractor, e), elements, len(spans), args.repeat)
+        after = spans_per_second(lambda s: batch_classify(extractor, s), spans, len(spans), args.repeat)
+        print(f"{pdf_file.name}: {len(spans)} spans | before {before:,.0f} spans/s | "
+              f"after {after:,.0f} spans/s | x{after / before:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for page triage in the shared document model
+Builds a mixed archive (digital text pages, scanned image-only pages, blank separators) and compares parse
+time with and without triage (see page_triage) on the dict backend, after checking that triage does not
+change the document model, against the lite backend (which skips triage: it never copies images)
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+
+from pdf_common.document_model import DocumentModel, page_triage  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+def mixed_archive(source_path: str, path: str, scanned_every: int, blank_every: int, dpi: int, jpeg: bool):
+    """Copy of a PDF where every scanned_every-th page is a scan of itself and blank pages separate groups"""
+    with fitz.open(source_path) as source, fitz.open() as doc:
+        for page_num, page in enumerate(source):
+            if blank_every and page_num and page_num % blank_every == 0:
+                doc.new_page(width=page.rect.width, height=page.rect.height)
+            if scanned_every and page_num % scanned_every == 0:
+                scan = doc.new_page(width=page.rect.width, height=page.rect.height)
+                pixmap = page.get_pixmap(dpi=dpi)
+                if jpeg:
+                    scan.insert_image(scan.rect, stream=pixmap.tobytes("jpeg"))
+                else:
+                    scan.insert_image(scan.rect, pixmap=pixmap)
+            else:
+                doc.insert_pdf(source, from_page=page_num, to_page=page_num)
+        doc.save(path, garbage=3, deflate=True)
+
+def ms_per_document(path: str, backend: str, triage: bool, repeat: int) -> float:
+    """Fastest of repeat parses (this is a noisy, shared-machine measurement)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with fitz.open(path) as doc:
+            DocumentModel.parse(doc, backend=backend, triage=triage)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--scanned-every", type=int, default=2, help="Every n-th page is scanned (0 = none)")
+    parser.add_argument("--blank-every", type=int, default=5, help="A blank page before every n-th page (0 = none)")
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--jpeg", action="store_true", help="Store scans as JPEG rather than lossless (Flate)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_files: List[str] = []
+        for source in generate_corpus(str(Path(tmp) / "digital"), args.documents, args.pages):
+            pdf_files.append(str(Path(tmp) / f"mixed_{Path(source).name}"))
+            mixed_archive(source, pdf_files[-1], args.scanned_every, args.blank_every, args.dpi, args.jpeg)
+        for input_dir in ("round_1a/input_round1a", "round_1b/input_round1b"):
+            pdf_files.extend(str(path) for path in sorted((REPO_ROOT / input_dir).glob("*.pdf")))
+        
+        for pdf_file in pdf_files:
+            with fitz.open(pdf_file) as doc:
+                # Triage must not change the model before its speed is worth comparing
+                assert DocumentModel.parse(doc, backend="dict", triage=False).to_dict() == \
+                    DocumentModel.parse(doc, backend="dict").to_dict()
+                verdicts = [page_triage(page) for page in doc]
+                page_count = len(doc)
+            
+            full = ms_per_document(pdf_file, "dict", False, args.repeat)
+            triaged = ms_per_document(pdf_file, "dict", True, args.repeat)
+            lite = ms_per_document(pdf_file, "lite", True, args.repeat)
+            print(f"{Path(pdf_file).name}: {page_count} pages ({verdicts.count('image')} image-only, "
+                  f"{verdicts.count('blank')} blank) | dict {full:.1f} -> {triaged:.1f} ms ({full / triaged:.2f}x) | "
+                  f"lite {lite:.1f} ms")
+
+if __name__ == "__main__":
+    main()
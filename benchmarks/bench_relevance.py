@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Round 1B section ranking
+Compares the legacy per-section keyword scorer with the TF-IDF matrix scorer on 10-document corpora: speed, and
+how many persona/job keyword matches each puts in its top 10 (the legacy scorer's own notion of relevance)
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "round_1b"))
+
+from persona_intelligence import DocumentIntelligence  # noqa: E402
+
+def legacy_relevance_score(intelligence: DocumentIntelligence, section: Dict, persona: str, job: str) -> float:
+    """Per-section keyword scorer as it was before the TF-IDF engine"""
+    content = section["content"].lower()
+    section_title = section["section_title"].lower()
+    
+    persona_keywords = intelligence.extract_keywords(persona)
+    job_keywords = intelligence.extract_keywords(job)
+    
+    persona_score = sum(1 for keyword in persona_keywords if keyword in content or keyword in section_title)
+    job_score = sum(1 for keyword in job_keywords if keyword in content or keyword in section_title)
+    length_score = min(len(content) / 1000, 1.0)
+    heading_bonus = 0.2 if section.get("is_heading", False) else 0
+    
+    return persona_score * 0.3 + job_score * 0.4 + length_score * 0.2 + heading_bonus
+
+def legacy_rank(intelligence: DocumentIntelligence, sections: List[Dict], persona: str, job: str) -> List[Dict]:
+    for section in sections:
+        section["relevance_score"] = legacy_relevance_score(intelligence, section, persona, job)
+    return sorted(sections, key=lambda x: x["relevance_score"], reverse=True)[:10]
+
+def tfidf_rank(intelligence: DocumentIntelligence, sections: List[Dict], persona: str, job: str) -> List[Dict]:
+    scores = intelligence.score_sections(sections, persona, job)
+    return [sections[i] for i in intelligence.top_k(scores, 10)]
+
+def keyword_matches(intelligence: DocumentIntelligence, ranked: List[Dict], persona: str, job: str) -> int:
+    """Persona/job keywords found in the ranked sections' titles or content, summed over the sections"""
+    keywords = intelligence.extract_keywords(persona) + intelligence.extract_keywords(job)
+    return sum(1 for section in ranked for keyword in keywords
+               if keyword in section["content"].lower() or keyword in section["section_title"].lower())
+
+def build_corpus(intelligence: DocumentIntelligence, input_dir: Path, n_documents: int) -> List[Dict]:
+    """n_documents-document corpus built by cycling through the bundled PDFs"""
+    pdf_files = sorted(input_dir.glob("*.pdf"))
+    corpus = []
+    for i in range(n_documents):
+        pdf_file = pdf_files[i % len(pdf_files)]
+        for section in intelligence.load_sections(pdf_file):
+            section["document"] = f"{i:02d}-{pdf_file.name}"
+            corpus.append(section)
+    return corpus
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", default=str(REPO_ROOT / "round_1b" / "input_round1b"))
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    input_dir = Path(args.input)
+    persona = (input_dir / "persona.txt").read_text(encoding='utf-8').strip()
+    job = (input_dir / "job.txt").read_text(encoding='utf-8').strip()
+    
+    intelligence = DocumentIntelligence()
+    corpus = build_corpus(intelligence, input_dir, args.documents)
+    
+    before = timed(lambda: legacy_rank(intelligence, corpus, persona, job), args.repeat)
+    after = timed(lambda: tfidf_rank(intelligence, corpus, persona, job), args.repeat)
+    # Query cost alone once the matrix is fitted (what a persistent index pays per persona)
+    matrix = intelligence.vectorizer.fit_transform([intelligence.section_text(s) for s in corpus])
+    query_only = timed(lambda: intelligence.top_k(
+        cosine_similarity(matrix, intelligence.vectorizer.transform([f"{persona} {job}"])).ravel(), 10),
+        args.repeat)
+    
+    print(f"{args.documents} documents, {len(corpus)} sections")
+    print(f"legacy keyword scorer: {before:.2f} ms ({len(corpus) / before * 1000:,.0f} sections/s)")
+    print(f"TF-IDF matrix scorer:  {after:.2f} ms ({len(corpus) / after * 1000:,.0f} sections/s)")
+    print(f"TF-IDF query only:     {query_only:.2f} ms ({len(corpus) / query_only * 1000:,.0f} sections/s)")
+    
+    legacy_matches = keyword_matches(intelligence, legacy_rank(intelligence, corpus, persona, job), persona, job)
+    tfidf_matches = keyword_matches(intelligence, tfidf_rank(intelligence, corpus, persona, job), persona, job)
+    print(f"keyword matches in the top 10: legacy {legacy_matches}, TF-IDF {tfidf_matches}")
+    if tfidf_matches < legacy_matches:
+        print("REGRESSION TF-IDF top 10 matches fewer persona/job keywords than the legacy scorer")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Round 1B streaming ranking
+Ranks a synthetic collection with every section in memory and with the two-pass streaming ranker
+(STREAM_RANKING=1), after checking both give the same result, and reports wall time and the peak
+Python heap of each
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+sys.path.insert(0, str(REPO_ROOT / "round_1b"))
+
+from synthetic_corpus import generate_corpus  # noqa: E402
+from persona_intelligence import DocumentIntelligence  # noqa: E402
+
+PERSONA = "PhD Researcher in Machine Learning"
+JOB = "Prepare a literature review of extraction methods"
+
+def ranked(input_dir: str, stream_ranking: bool) -> Tuple[Dict[str, Any], float, int]:
+    """Result, seconds and peak traced bytes of one process_documents run"""
+    intelligence = DocumentIntelligence(stream_ranking=stream_ranking)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = intelligence.process_documents(input_dir, PERSONA, JOB)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result["metadata"].pop("processing_timestamp")
+    return result, seconds, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_corpus(tmp, args.documents, args.pages)
+        in_memory, memory_seconds, memory_peak = ranked(tmp, False)
+        streamed, stream_seconds, stream_peak = ranked(tmp, True)
+    
+    if streamed != in_memory:
+        print("MISMATCH streaming ranking differs from the in-memory ranking")
+        sys.exit(1)
+    print(f"{args.documents} documents x {args.pages} pages")
+    print(f"in memory: {memory_seconds:.2f} s, peak heap {memory_peak / 2**20:.1f} MB")
+    print(f"streaming: {stream_seconds:.2f} s, peak heap {stream_peak / 2**20:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the text extraction backends of the shared document model
+Compares per-page get_text cost and peak Python memory of each backend (see TEXT_BACKENDS)
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from pdf_common.document_model import TEXT_BACKENDS, DocumentModel, page_blocks  # noqa: E402
+
+def ms_per_page(doc: fitz.Document, backend: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in doc:
+            page_blocks(page, backend)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(doc))
+
+def peak_bytes_per_page(doc: fitz.Document, backend: str) -> float:
+    """Largest Python allocation peak while extracting any single page"""
+    peak = 0
+    for page in doc:
+        tracemalloc.start()
+        blocks = page_blocks(page, backend)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        del blocks
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", nargs="+", default=[str(REPO_ROOT / "round_1a" / "input_round1a"),
+                                                       str(REPO_ROOT / "round_1b" / "input_round1b")])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    pdf_files: List[Path] = []
+    for input_dir in args.input:
+        pdf_files.extend(sorted(Path(input_dir).glob("*.pdf")))
+    
+    for pdf_file in pdf_files:
+        with fitz.open(str(pdf_file)) as doc:
+            # Every backend must yield the same model before its speed is worth comparing
+            models = [DocumentModel.parse(doc, backend=backend).to_dict() for backend in TEXT_BACKENDS]
+            assert all(model == models[0] for model in models)
+            
+            results = []
+            for backend in TEXT_BACKENDS:
+                cost = ms_per_page(doc, backend, args.repeat)
+                peak = peak_bytes_per_page(doc, backend)
+                results.append(f"{backend} {cost:.2f} ms/page, peak {peak / 1024:,.0f} KiB")
+            print(f"{pdf_file.name}: {len(doc)} pages | " + " | ".join(results))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Cold-start check for the container entry points
+Imports each entry point in a fresh interpreter under `python -X importtime` and fails (exit 1)
+when the import exceeds its budget or loads a dependency that only some code paths need
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Set, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Entry point -> (directory it runs from, import budget in ms)
+ENTRY_POINTS = {
+    "pdf_structure_extractor": (REPO_ROOT / "round_1a", 500),
+    "persona_intelligence": (REPO_ROOT / "round_1b", 500),
+}
+
+# Loaded on demand only: scoring (scikit-learn/SciPy) and batch mode (multiprocessing pools)
+LAZY_MODULES = ("sklearn", "scipy", "concurrent.futures.process")
+
+# pdf_common/ sits next to the entry point in the container; here it is found through the repository root
+ENV = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def import_profile(module: str, cwd: Path) -> Tuple[float, Set[str]]:
+    """Cumulative import time of module (ms) and every module it loaded, in a fresh interpreter"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=str(cwd), env=ENV, capture_output=True, text=True, check=True)
+    cumulative, loaded = 0.0, set()
+    for match in IMPORT_LINE.finditer(completed.stderr):
+        name = match.group(4)
+        loaded.add(name)
+        if name == module and len(match.group(3)) == 1:  # Top level, not a nested import
+            cumulative = int(match.group(2)) / 1000
+    return cumulative, loaded
+
+def lazy_violations(loaded: Set[str]) -> List[str]:
+    return sorted(name for name in loaded
+                  if any(name == lazy or name.startswith(f"{lazy}.") for lazy in LAZY_MODULES))
+
+def index_query_modules() -> Set[str]:
+    """Modules a Round 1B query against an existing section index loads (it should not need scikit-learn)"""
+    round_1b = REPO_ROOT / "round_1b"
+    with tempfile.TemporaryDirectory() as index_dir:
+        setup = ("from persona_intelligence import DocumentIntelligence, SectionIndex\n"
+                 f"SectionIndex.open(DocumentIntelligence(), 'input_round1b', {index_dir!r})\n")
+        subprocess.run([sys.executable, "-c", setup], cwd=str(round_1b), env=ENV, capture_output=True, check=True)
+        
+        query = ("import sys\n"
+                 "from persona_intelligence import DocumentIntelligence, SectionIndex\n"
+                 "intelligence = DocumentIntelligence()\n"
+                 f"index = SectionIndex.open(intelligence, 'input_round1b', {index_dir!r})\n"
+                 "index.query(intelligence, 'Student', 'docker')\n"
+                 "print('\\n'.join(sys.modules))\n")
+        completed = subprocess.run([sys.executable, "-c", query], cwd=str(round_1b), env=ENV, capture_output=True,
+                                   text=True, check=True)
+    return set(completed.stdout.split())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per entry point; the fastest counts")
+    parser.add_argument("--budget-ms", type=float, help="Override every entry point's import budget")
+    args = parser.parse_args()
+    
+    failures = []
+    for module, (cwd, budget) in ENTRY_POINTS.items():
+        budget = args.budget_ms or budget
+        profiles = [import_profile(module, cwd) for _ in range(args.repeat)]
+        best = min(cumulative for cumulative, _ in profiles)
+        violations = lazy_violations(profiles[0][1])
+        
+        status = "ok" if best <= budget and not violations else "FAIL"
+        print(f"{module}: {best:.0f} ms (budget {budget:.0f} ms) {status}")
+        if best > budget:
+            failures.append(f"{module} imports in {best:.0f} ms > {budget:.0f} ms")
+        if violations:
+            failures.append(f"{module} imports {', '.join(violations)} at module load")
+    
+    violations = lazy_violations(index_query_modules())
+    print(f"round1b index query: {'FAIL' if violations else 'ok'}")
+    if violations:
+        failures.append(f"index query imports {', '.join(violations)}")
+    
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Incremental corpus check for Round 1B
+Keeps an IncrementalCorpus in sync with an input directory while documents are added, removed and replaced
+(same name, new content), and fails (exit 1) unless every ranking matches a full process_documents recompute
+over the same PDFs
+"""
+
+import argparse
+import logging
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+sys.path.insert(0, str(REPO_ROOT / "round_1b"))
+
+from synthetic_corpus import generate_corpus  # noqa: E402
+from persona_intelligence import DocumentIntelligence  # noqa: E402
+from incremental_corpus import IncrementalCorpus  # noqa: E402
+
+QUERIES = [
+    ("PhD Researcher in Machine Learning", "Prepare a literature review of extraction methods"),
+    ("Machine Learning Engineer", "Analyze technical papers for AI advancements"),
+]
+
+def without_timestamp(result: Dict[str, Any]) -> Dict[str, Any]:
+    result["metadata"].pop("processing_timestamp")
+    return result
+
+def mismatches(intelligence: DocumentIntelligence, corpus: IncrementalCorpus, input_dir: str) -> List[str]:
+    """Queries whose incremental ranking differs from a full recompute"""
+    return [f"{persona!r}/{job!r}" for persona, job in QUERIES
+            if without_timestamp(corpus.rank(persona, job)) !=
+            without_timestamp(intelligence.process_documents(input_dir, persona, job))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    
+    intelligence = DocumentIntelligence()
+    corpus = IncrementalCorpus(intelligence)
+    
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = str(Path(tmp) / "input")
+        pdf_files = generate_corpus(input_dir, args.documents, args.pages)
+        for pdf_file in sorted((REPO_ROOT / "round_1b" / "input_round1b").glob("*.pdf")):
+            shutil.copy(pdf_file, input_dir)
+        spare = generate_corpus(str(Path(tmp) / "spare"), 2, args.pages, seed=100)
+        
+        # Each step changes the input directory, then the corpus catches up with sync alone
+        steps = [
+            ("initial", lambda: None),
+            ("add", lambda: shutil.copy(spare[0], input_dir)),
+            ("remove", lambda: Path(pdf_files[1]).unlink()),
+            ("replace", lambda: shutil.copyfile(spare[1], pdf_files[0])),
+        ]
+        for name, change in steps:
+            change()
+            added, removed = corpus.sync(input_dir)
+            wrong = mismatches(intelligence, corpus, input_dir)
+            failures.extend(f"{name}: {query}" for query in wrong)
+            print(f"{name}: {len(added)} added or changed, {len(removed)} removed, "
+                  f"{len(corpus.document_names)} documents, {'MISMATCH' if wrong else 'ok'}")
+    
+    for failure in failures:
+        print(f"MISMATCH {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
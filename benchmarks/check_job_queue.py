@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Multi-node batch check on one machine
+Worker processes stand in for nodes sharing a job queue (pdf_common/job_queue.py). One of them dies while
+holding a lease and an unreadable PDF fails every attempt. The run fails (exit 1) unless the Round 1A
+outlines and the coordinator's Round 1B ranking match a single-process run over the same PDFs.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+sys.path.insert(0, str(REPO_ROOT / "round_1a"))
+sys.path.insert(0, str(REPO_ROOT / "round_1b"))
+
+from synthetic_corpus import generate_corpus  # noqa: E402
+import pdf_structure_extractor  # noqa: E402
+import persona_intelligence  # noqa: E402
+from pdf_common.job_queue import JobQueue  # noqa: E402
+
+PERSONA = "PhD Researcher in Machine Learning"
+JOB = "Prepare a literature review of extraction methods"
+
+def crashed_node(input_dir: str, queue_dir: str):
+    """Queue the PDFs like any node, claim one under a short lease and die without finishing it"""
+    queue = JobQueue(queue_dir, lease_seconds=2)
+    queue.enqueue(sorted(Path(input_dir).glob("*.pdf")))
+    queue.claim("crashed-node")
+    os._exit(1)
+
+def round1a_node(input_dir: str, output_dir: str, queue_dir: str):
+    pdf_structure_extractor.process_queue(input_dir, output_dir, queue_dir)
+
+def round1b_node(input_dir: str, output_dir: str, queue_dir: str, coordinator: bool):
+    result = persona_intelligence.process_queue(persona_intelligence.DocumentIntelligence(), input_dir, queue_dir,
+                                                PERSONA, JOB, coordinator=coordinator)
+    if result is not None:
+        with open(Path(output_dir) / "challenge1b_output.json", 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+def run_nodes(target, args_per_node, input_dir: str, queue_dir: str) -> JobQueue:
+    """Kill one node mid-job, then run the others to completion"""
+    crashed = multiprocessing.Process(target=crashed_node, args=(input_dir, queue_dir))
+    crashed.start()
+    crashed.join()
+    
+    nodes = [multiprocessing.Process(target=target, args=args) for args in args_per_node]
+    for node in nodes:
+        node.start()
+    for node in nodes:
+        node.join()
+    return JobQueue(queue_dir)
+
+def retried_jobs(queue: JobQueue):
+    return [job.id for job in queue.jobs("done") if job.attempts > 1]
+
+def without_timestamp(result):
+    result["metadata"].pop("processing_timestamp")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=12)
+    parser.add_argument("--pages", type=int, default=6)
+    args = parser.parse_args()
+    
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_dir = tmp / "input"
+        generate_corpus(str(input_dir), args.documents, args.pages)
+        for pdf_file in (REPO_ROOT / "round_1b" / "input_round1b").glob("*.pdf"):
+            shutil.copy(pdf_file, input_dir)
+        (input_dir / "unreadable.pdf").write_bytes(b"not a pdf")
+        pdf_count = len(list(input_dir.glob("*.pdf")))
+        
+        # Round 1A: every node writes the outlines of the PDFs it claims
+        pdf_structure_extractor.process_pdfs(str(input_dir), str(tmp / "1a_single"))
+        queue_dir = str(tmp / "1a_queue")
+        queue = run_nodes(round1a_node, [(str(input_dir), str(tmp / "1a_nodes"), queue_dir)] * args.nodes,
+                          str(input_dir), queue_dir)
+        counts, retried = queue.counts(), retried_jobs(queue)
+        print(f"round1a: {pdf_count} PDFs, jobs {counts}, retried after a lost node: {retried}")
+        if counts != {"done": pdf_count} or len(retried) != 1:
+            failures.append(f"round1a jobs {counts}, retried {retried}")
+        for expected in sorted((tmp / "1a_single").glob("*.json")):
+            produced = tmp / "1a_nodes" / expected.name
+            if not produced.exists() or produced.read_bytes() != expected.read_bytes():
+                failures.append(f"round1a {expected.name} differs")
+        
+        # Round 1B: nodes extract sections, the coordinator ranks them once the queue drains
+        single = persona_intelligence.DocumentIntelligence().process_documents(str(input_dir), PERSONA, JOB)
+        output_dir = tmp / "1b_nodes"
+        output_dir.mkdir()
+        queue_dir = str(tmp / "1b_queue")
+        queue = run_nodes(round1b_node, [(str(input_dir), str(output_dir), queue_dir, node == 0)
+                                         for node in range(args.nodes)], str(input_dir), queue_dir)
+        counts, retried = queue.counts(), retried_jobs(queue)
+        print(f"round1b: {pdf_count} PDFs, jobs {counts}, retried after a lost node: {retried}")
+        if counts != {"done": pdf_count - 1, "failed": 1} or len(retried) != 1:
+            failures.append(f"round1b jobs {counts}, retried {retried}")
+        with open(output_dir / "challenge1b_output.json", 'r', encoding='utf-8') as f:
+            merged = json.load(f)
+        if without_timestamp(merged) != without_timestamp(single):
+            failures.append("round1b merged ranking differs from a single-process run")
+    
+    for failure in failures:
+        print(f"MISMATCH {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+End-to-end check of the Round 1B query service
+Serves a synthetic collection on a free local port and drives it through QueryClient: health, queries before
+and after ingesting a new PDF, and malformed (400) and unknown (404) requests. Fails (exit 1) unless every
+ranking matches process_documents over the same PDFs and every error comes back with its status.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+sys.path.insert(0, str(REPO_ROOT / "round_1b"))
+
+from synthetic_corpus import generate_corpus  # noqa: E402
+from persona_intelligence import DocumentIntelligence  # noqa: E402
+from query_service import QueryClient, QueryService  # noqa: E402
+
+PERSONA = "PhD Researcher in Machine Learning"
+JOB = "Prepare a literature review of extraction methods"
+
+def without_timestamp(result: Dict[str, Any]) -> Dict[str, Any]:
+    result["metadata"].pop("processing_timestamp")
+    return result
+
+async def status_of(call, *args) -> str:
+    """HTTP status a failing client call reports ("200" when it succeeds)"""
+    try:
+        await asyncio.to_thread(call, *args)
+        return "200"
+    except RuntimeError as e:
+        return str(e).split(":")[0]
+
+async def run_checks(input_dir: str, state_dir: str, new_pdf: str, workers: int) -> List[str]:
+    """Start the service, then make every client call from a thread so the event loop keeps serving"""
+    failures = []
+    service = QueryService(input_dir, state_dir, workers)
+    server = await service.start(port=0)
+    client = QueryClient(port=server.sockets[0].getsockname()[1])
+    try:
+        health = await asyncio.to_thread(client.health)
+        if len(health["documents"]) != len(list(Path(input_dir).glob("*.pdf"))):
+            failures.append(f"health lists {len(health['documents'])} documents")
+        
+        for step in ("query", "query after ingest"):
+            if step == "query after ingest":
+                ingested = await asyncio.to_thread(client.ingest, new_pdf)
+                if ingested["generation"] != health["generation"] + 1:
+                    failures.append(f"ingest published generation {ingested['generation']}")
+            served = without_timestamp(await asyncio.to_thread(client.query, PERSONA, JOB))
+            expected = without_timestamp(DocumentIntelligence().process_documents(input_dir, PERSONA, JOB))
+            if served != expected:
+                failures.append(f"{step} differs from process_documents")
+        
+        errors = {
+            "query without job": (await status_of(client.request, "POST", "/query", {"persona": PERSONA}), "400"),
+            "ingest of a non-PDF": (await status_of(client.ingest, str(Path(input_dir) / "missing.txt")), "400"),
+            "unknown route": (await status_of(client.request, "GET", "/missing"), "404"),
+        }
+        failures.extend(f"{name} returned {status}, expected {expected}"
+                        for name, (status, expected) in errors.items() if status != expected)
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.close()
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = str(Path(tmp) / "input")
+        generate_corpus(input_dir, args.documents, args.pages)
+        new_pdf = generate_corpus(str(Path(tmp) / "new"), 1, args.pages, seed=100)[0]
+        failures = asyncio.run(run_checks(input_dir, str(Path(tmp) / "state"), new_pdf, args.workers))
+    
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"{args.documents + 1} documents served: health, query, ingest, 400 and 404 responses ok")
+
+if __name__ == "__main__":
+    main()
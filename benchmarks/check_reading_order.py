@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Reading-order check on multi-column synthetic PDFs
+Generates papers whose columns are interleaved in the content stream (optionally split by full-width
+captions) and fails (exit 1) unless both pipelines see the headings in their bookmarked reading order.
+Single-column bulleted lists, whose bullet glyphs PyMuPDF returns as separate lines, and key/value tables must not
+read as columns.
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+sys.path.insert(0, str(REPO_ROOT / "round_1a"))
+sys.path.insert(0, str(REPO_ROOT / "round_1b"))
+
+from synthetic_corpus import generate_corpus  # noqa: E402
+from pdf_structure_extractor import PDFStructureExtractor  # noqa: E402
+from persona_intelligence import DocumentIntelligence  # noqa: E402
+
+# Variant name -> synthetic_corpus layout options
+LAYOUTS = {
+    "2col": {"columns": 2},
+    "2col_captions": {"columns": 2, "captions": True},
+    "3col": {"columns": 3},
+    "3col_captions": {"columns": 3, "captions": True},
+}
+
+def in_reading_order(found: List[str], expected: List[str]) -> bool:
+    """Whether at least 90% of the expected headings were found, in the expected order"""
+    wanted = set(expected)
+    found = [text for text in found if text in wanted]
+    seen = set(found)
+    return len(found) >= 0.9 * len(expected) and found == [text for text in expected if text in seen]
+
+def bulleted_list(path: str, headings: int = 2, items: int = 18) -> List[str]:
+    """One-column page of headings over "•  item" lines (the bullet strip must not become a column); returns the
+    items in reading order"""
+    with fitz.open() as doc:
+        page = doc.new_page()
+        y = 72
+        for heading in range(headings):
+            page.insert_text((72, y), f"Heading {heading} Over A Bulleted List Of Items", fontsize=14)
+            y += 22
+            for item in range(heading * items, (heading + 1) * items):
+                page.insert_text((80, y), "•", fontsize=10)
+                page.insert_text((96, y), f"item {item} of the list", fontsize=10)
+                y += 15
+            y += 10
+        doc.save(path)
+    return [f"item {item} of the list" for item in range(headings * items)]
+
+def bullets_in_order(intelligence: DocumentIntelligence, path: str, expected: List[str]) -> bool:
+    """Whether every item directly follows its own bullet, in list order"""
+    content = "".join(section["content"] for section in intelligence.load_sections(Path(path)))
+    return [item.strip() for item in re.findall(r'^\S\s*\n(item [^\n]*)', content, re.M)] == expected
+
+def key_value_table(path: str, headings: int = 3, rows: int = 8) -> List[str]:
+    """One-column page of headings over two-column key/value rows (the gap after the short keys must not become a
+    gutter); returns the rows in reading order"""
+    with fitz.open() as doc:
+        page = doc.new_page()
+        y = 72
+        for heading in range(headings):
+            page.insert_text((72, y), f"Heading {heading} Over A Table", fontsize=14)
+            y += 22
+            for row in range(heading * rows, (heading + 1) * rows):
+                page.insert_text((72, y), f"key {row}", fontsize=10)
+                page.insert_text((250, y), f"value {row} of the table", fontsize=10)
+                y += 15
+            y += 10
+        doc.save(path)
+    return [f"key {row} value {row} of the table" for row in range(headings * rows)]
+
+def rows_in_order(intelligence: DocumentIntelligence, path: str, expected: List[str]) -> bool:
+    """Whether every value directly follows its own key, under the heading above it"""
+    sections = intelligence.load_sections(Path(path))
+    found = [re.sub(r'\s+', ' ', row) for section in sections
+             for row in re.findall(r'^(key \d+\s*\nvalue [^\n]*?)\s*$', section["content"], re.M)]
+    return found == expected and all(f"Heading {i}" in section["section_title"] for i, section in enumerate(sections))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=6)
+    args = parser.parse_args()
+    
+    extractor = PDFStructureExtractor(use_toc=False)  # The bookmarks are the expected answer, not an input
+    intelligence = DocumentIntelligence()
+    
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, layout in LAYOUTS.items():
+            paths = generate_corpus(str(Path(tmp) / name), args.documents, args.pages, toc=True, interleave=True,
+                                    **layout)
+            for path in paths:
+                with fitz.open(path) as doc:
+                    expected = [text for _, text, _ in doc.get_toc()]
+                
+                outline = [entry["text"] for entry in extractor.extract_outline(path)["outline"]]
+                sections = [section["section_title"] for section in intelligence.load_sections(Path(path))
+                            if section["is_heading"]]
+                
+                for pipeline, found in (("round1a", outline), ("round1b", sections)):
+                    if not in_reading_order(found, expected):
+                        failures.append(f"{name}/{Path(path).name} {pipeline}")
+            print(f"{name}: {len(paths)} PDFs checked")
+        
+        bullets = str(Path(tmp) / "bullets.pdf")
+        if not bullets_in_order(intelligence, bullets, bulleted_list(bullets)):
+            failures.append("bullets/bullets.pdf round1b")
+        print("bullets: 1 PDF checked")
+        
+        table = str(Path(tmp) / "table.pdf")
+        if not rows_in_order(intelligence, table, key_value_table(table)):
+            failures.append("table/table.pdf round1b")
+        print("table: 1 PDF checked")
+    
+    for failure in failures:
+        print(f"OUT OF ORDER {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Running header check for Round 1A
+Generates a report whose running header repeats the text of a real heading (a bold "Introduction" at the
+top of every page, and the 16pt "Introduction" heading on page 1). Fails (exit 1) unless the outline lists
+that heading exactly once, on page 1, with dedupe on as with DEDUPE=0.
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "round_1a"))
+
+from pdf_structure_extractor import PDFStructureExtractor  # noqa: E402
+
+HEADING = "Introduction"
+
+def report_with_running_header(path: str, pages: int):
+    """Report whose every page starts with a small bold running header that repeats the first heading"""
+    with fitz.open() as doc:
+        for page_num in range(pages):
+            page = doc.new_page()
+            page.insert_text((72, 40), HEADING, fontsize=11, fontname="hebo")
+            y = 200
+            if page_num == 0:
+                page.insert_text((72, 100), "Annual Report", fontsize=24)
+                page.insert_text((72, 160), HEADING, fontsize=16, fontname="hebo")
+            for line in range(20):
+                page.insert_text((72, y + line * 14), f"Body text line {line} on page {page_num + 1}.", fontsize=10)
+        doc.save(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=6)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "running_header.pdf")
+        report_with_running_header(path, args.pages)
+        for dedupe in (True, False):
+            outline = PDFStructureExtractor(dedupe=dedupe, use_toc=False).extract_outline(path)["outline"]
+            headings = [(entry["text"], entry["page"]) for entry in outline if entry["text"] == HEADING]
+            print(f"dedupe={dedupe}: {headings}")
+            if headings != [(HEADING, 1)]:
+                failures.append(f"dedupe={dedupe} outline has {headings}, expected the page 1 heading once")
+    
+    for failure in failures:
+        print(f"MISMATCH {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark suite for both pipelines
+Generates a synthetic corpus offline, measures throughput, latency percentiles and peak memory,
+and writes a JSON baseline that later runs can be compared against
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+# Scenario name -> corpus and workload; budgets are the README's performance claims
+SCENARIOS = {
+    "round1a_10p": {"pipeline": "round1a", "documents": 5, "pages": 10, "columns": 1},
+    "round1a_50p": {"pipeline": "round1a", "documents": 3, "pages": 50, "columns": 1, "budget_seconds": 10},
+    "round1a_50p_2col": {"pipeline": "round1a", "documents": 3, "pages": 50, "columns": 2, "budget_seconds": 10},
+    "round1a_50p_toc": {"pipeline": "round1a", "documents": 3, "pages": 50, "columns": 1, "toc": True,
+                        "budget_seconds": 10},
+    "round1a_50p_toc_heuristic": {"pipeline": "round1a", "documents": 3, "pages": 50, "columns": 1, "toc": True,
+                                  "force_heuristic": True, "budget_seconds": 10},
+    "round1a_50p_dense_headings": {"pipeline": "round1a", "documents": 3, "pages": 50, "columns": 1,
+                                   "heading_density": 0.8, "budget_seconds": 10},
+    "round1a_50p_sparse_headings": {"pipeline": "round1a", "documents": 3, "pages": 50, "columns": 1,
+                                    "heading_density": 0.05, "budget_seconds": 10},
+    "round1a_50p_font_mix": {"pipeline": "round1a", "documents": 3, "pages": 50, "columns": 1,
+                             "fonts": ["helvetica", "times", "courier"], "budget_seconds": 10},
+    "round1b_10docs": {"pipeline": "round1b", "documents": 10, "pages": 20, "columns": 1, "budget_seconds": 60},
+    "round1b_10docs_dense_font_mix": {"pipeline": "round1b", "documents": 10, "pages": 20, "columns": 1,
+                                      "heading_density": 0.8, "fonts": ["helvetica", "times", "courier"],
+                                      "budget_seconds": 60},
+}
+
+# Scenario keys passed through to generate_corpus (absent ones keep its defaults)
+CORPUS_OPTIONS = ("columns", "toc", "heading_density", "fonts")
+
+# Higher is better for throughput, lower for everything else
+THROUGHPUT_KEYS = ("pages_per_second", "sections_per_second")
+LATENCY_KEYS = ("p50_seconds", "p99_seconds", "peak_rss_bytes")
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50_seconds": float(np.percentile(samples, 50)),
+        "p99_seconds": float(np.percentile(samples, 99)),
+        "max_seconds": float(max(samples))
+    }
+
+def peak_rss_bytes() -> int:
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def run_round1a(corpus: List[str], repeat: int, force_heuristic: bool = False) -> Dict[str, Any]:
+    """Per-document extract_outline latency and page throughput (runs in a fresh process)"""
+    sys.path.insert(0, str(REPO_ROOT / "round_1a"))
+    import fitz
+    from pdf_structure_extractor import PDFStructureExtractor
+    
+    extractor = PDFStructureExtractor(use_toc=not force_heuristic)
+    pages = sum(len(fitz.open(path)) for path in corpus)
+    samples = []
+    for _ in range(repeat):
+        for path in corpus:
+            start = time.perf_counter()
+            extractor.extract_outline(path)
+            samples.append(time.perf_counter() - start)
+    
+    return dict(percentiles(samples), pages=pages, documents=len(corpus),
+                pages_per_second=pages * repeat / sum(samples), peak_rss_bytes=peak_rss_bytes())
+
+def run_round1b(corpus: List[str], repeat: int) -> Dict[str, Any]:
+    """Whole-collection process_documents latency and section throughput (runs in a fresh process)"""
+    sys.path.insert(0, str(REPO_ROOT / "round_1b"))
+    import fitz
+    from persona_intelligence import DocumentIntelligence
+    from pdf_common.metrics import RunMetrics
+    
+    input_dir = str(Path(corpus[0]).parent)
+    pages = sum(len(fitz.open(path)) for path in corpus)
+    samples = []
+    sections = 0
+    for _ in range(repeat):
+        metrics = RunMetrics("round1b")
+        intelligence = DocumentIntelligence(metrics=metrics)
+        start = time.perf_counter()
+        intelligence.process_documents(input_dir, "PhD Researcher in Machine Learning",
+                                       "Literature review of ranking and embedding methods")
+        samples.append(time.perf_counter() - start)
+        sections = metrics.counters.get("sections", 0)
+    
+    return dict(percentiles(samples), pages=pages, documents=len(corpus), sections=sections,
+                pages_per_second=pages * repeat / sum(samples),
+                sections_per_second=sections * repeat / sum(samples), peak_rss_bytes=peak_rss_bytes())
+
+def run_scenario(name: str, spec: Dict[str, Any], work_dir: Path, repeat: int) -> Dict[str, Any]:
+    corpus = generate_corpus(str(work_dir / name), spec["documents"], spec["pages"],
+                             **{key: spec[key] for key in CORPUS_OPTIONS if key in spec})
+    
+    # A fresh interpreter per scenario keeps peak memory figures independent
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        if spec["pipeline"] == "round1a":
+            future = executor.submit(run_round1a, corpus, repeat, spec.get("force_heuristic", False))
+        else:
+            future = executor.submit(run_round1b, corpus, repeat)
+        result = future.result()
+    
+    if "budget_seconds" in spec:
+        result["budget_seconds"] = spec["budget_seconds"]
+        result["within_budget"] = result["max_seconds"] <= spec["budget_seconds"]
+    return dict(result, **{k: v for k, v in spec.items() if k != "budget_seconds"})
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond tolerance (relative) against a baseline report"""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        for key in THROUGHPUT_KEYS:
+            if key in result and before.get(key) and result[key] < before[key] * (1 - tolerance):
+                regressions.append(f"{name}.{key}: {before[key]:.4g} -> {result[key]:.4g}")
+        for key in LATENCY_KEYS:
+            if key in result and before.get(key) and result[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name}.{key}: {before[key]:.4g} -> {result[key]:.4g}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write this run's report")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+    
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "scenarios": {}
+    }
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in args.scenarios:
+            result = run_scenario(name, SCENARIOS[name], Path(work_dir), args.repeat)
+            report["scenarios"][name] = result
+            budget = ""
+            if "within_budget" in result:
+                budget = f" | budget {result['budget_seconds']}s {'ok' if result['within_budget'] else 'EXCEEDED'}"
+            print(f"{name}: {result['pages_per_second']:,.1f} pages/s | p50 {result['p50_seconds']:.3f}s "
+                  f"p99 {result['p99_seconds']:.3f}s | peak RSS {result['peak_rss_bytes'] / 2**20:.0f} MiB{budget}")
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
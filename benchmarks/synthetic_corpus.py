@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Synthetic PDF corpus generator
+Builds reproducible test PDFs offline with PyMuPDF: configurable page counts, heading density,
+font mixes, multi-column layouts and optional bookmarks (embedded TOC). Multi-column pages can
+interleave their columns in the content stream and carry full-width captions, as real papers do
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import fitz  # PyMuPDF
+
+# Base-14 fonts available without embedding: (regular, bold)
+FONT_MIXES = {
+    "helvetica": ("helv", "hebo"),
+    "times": ("tiro", "tibo"),
+    "courier": ("cour", "cobo"),
+}
+
+WORDS = (
+    "analysis approach benchmark cluster compute dataset document embedding evaluation extraction "
+    "feature framework graph heading index inference language layout learning matrix method model "
+    "network outline parser performance persona pipeline ranking relevance research section "
+    "similarity structure summary system text training vector workflow"
+).split()
+
+TOPICS = (
+    "Introduction", "Background", "Related Work", "Methodology", "Data Collection", "Experiments",
+    "Results", "Discussion", "Limitations", "Future Work", "Conclusion", "Appendix"
+)
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter, points
+MARGIN = 54
+GUTTER = 18
+
+def paragraph(rng: random.Random, sentences: int) -> str:
+    out = []
+    for _ in range(sentences):
+        words = rng.choices(WORDS, k=rng.randint(8, 18))
+        out.append(" ".join(words).capitalize() + ".")
+    return " ".join(out)
+
+def generate_pdf(path: str, pages: int = 10, heading_density: float = 0.3,
+                 fonts: Sequence[str] = ("helvetica",), columns: int = 1,
+                 seed: int = 0, title: Optional[str] = None, toc: bool = False,
+                 interleave: bool = False, captions: bool = False) -> str:
+    """Write a synthetic PDF; heading_density is the chance that a paragraph is preceded by a heading.
+    Headings are bookmarked (toc) in reading order: band by band, each column top to bottom.
+    interleave writes the content stream row by row across columns; captions adds a full-width
+    caption mid-page that splits the columns into two bands."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    column_width = (PAGE_WIDTH - 2 * MARGIN - (columns - 1) * GUTTER) / columns
+    chapter, subsection = 0, 0
+    bookmarks = []  # [level, text, page] for every heading
+    scratch = fitz.open() if interleave else None  # Lays pages out to check fits before the real write
+    
+    for page_num in range(pages):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        regular, bold = FONT_MIXES[rng.choice(list(fonts))]
+        top = MARGIN
+        
+        if page_num == 0:
+            doc_title = title or f"Synthetic Report {seed}"
+            page.insert_text((MARGIN, top + 24), doc_title, fontsize=24, fontname=bold)
+            top += 48
+        
+        # Running header/footer, as real reports have
+        page.insert_text((MARGIN, PAGE_HEIGHT - 24), f"Page {page_num + 1} of {pages}", fontsize=8,
+                         fontname=regular)
+        
+        # Drawing calls, replayed onto the page in row order when interleaving
+        layout = scratch.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT) if interleave else page
+        calls = []
+        
+        def draw(y: float, x: float, method: str, *args, **kwargs):
+            calls.append((y, x, method, args, kwargs))
+            return getattr(layout, method)(*args, **kwargs)
+        
+        bands = [(top, PAGE_HEIGHT - MARGIN)]
+        if captions:
+            middle = (top + PAGE_HEIGHT - MARGIN) / 2
+            bands = [(top, middle - 32), (middle + 24, PAGE_HEIGHT - MARGIN)]
+        
+        for band, (band_top, band_bottom) in enumerate(bands):
+            if band:
+                # One line across most of the page width, so it visibly spans the columns
+                caption = f"Figure {page_num + 1}."
+                while fitz.get_text_length(caption, fontname=regular, fontsize=9) < 0.7 * (PAGE_WIDTH - 2 * MARGIN):
+                    caption += f" {rng.choice(WORDS)}"
+                draw(band_top - 40, MARGIN, "insert_textbox",
+                     fitz.Rect(MARGIN, band_top - 40, PAGE_WIDTH - MARGIN, band_top - 8), caption + ".",
+                     fontsize=9, fontname=regular)
+            
+            for column in range(columns):
+                x0 = MARGIN + column * (column_width + GUTTER)
+                y = band_top
+                while y < band_bottom - 60:
+                    if rng.random() < heading_density:
+                        if rng.random() < 0.4 or chapter == 0:
+                            chapter, subsection = chapter + 1, 0
+                            text, size = f"{chapter}. {TOPICS[(chapter - 1) % len(TOPICS)]}", 16
+                            level = 1
+                        else:
+                            subsection += 1
+                            text, size = f"{chapter}.{subsection} {rng.choice(WORDS).capitalize()} " \
+                                         f"{rng.choice(WORDS).capitalize()}", 13
+                            level = 2
+                        draw(y, x0, "insert_text", (x0, y + size), text, fontsize=size, fontname=bold)
+                        bookmarks.append([level, text, page_num + 1])
+                        y += size + 10
+                    
+                    body = paragraph(rng, rng.randint(2, 5))
+                    height = min(band_bottom - y, 14 * (len(body) * 5.2 / column_width + 2))
+                    rect = fitz.Rect(x0, y, x0 + column_width, y + height)
+                    if draw(y, x0, "insert_textbox", rect, body, fontsize=10, fontname=regular) < 0:
+                        calls.pop()  # Did not fit (nothing was drawn): the column is full
+                        break
+                    y += height + 8
+        
+        if interleave:
+            # Row by row across the columns, so raw extraction order mixes them up
+            for _, _, method, args, kwargs in sorted(calls, key=lambda call: (call[0], call[1])):
+                getattr(page, method)(*args, **kwargs)
+    
+    doc.set_metadata({"title": title or f"Synthetic Report {seed}"})
+    if toc:
+        doc.set_toc(bookmarks)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+def generate_corpus(out_dir: str, documents: int = 10, pages: int = 10, heading_density: float = 0.3,
+                    fonts: Sequence[str] = ("helvetica", "times"), columns: int = 1, seed: int = 0,
+                    toc: bool = False, interleave: bool = False, captions: bool = False) -> List[str]:
+    """Write `documents` synthetic PDFs into out_dir and return their paths"""
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    return [
+        generate_pdf(str(out_path / f"synthetic_{seed + i:03d}.pdf"), pages, heading_density, fonts, columns,
+                     seed + i, toc=toc, interleave=interleave, captions=captions)
+        for i in range(documents)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic PDF corpus")
+    parser.add_argument("out_dir")
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--heading-density", type=float, default=0.3)
+    parser.add_argument("--fonts", nargs="+", default=["helvetica", "times"], choices=sorted(FONT_MIXES))
+    parser.add_argument("--columns", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--toc", action="store_true", help="Embed bookmarks for every heading")
+    parser.add_argument("--interleave", action="store_true",
+                        help="Write multi-column pages row by row, interleaving the columns in the content stream")
+    parser.add_argument("--captions", action="store_true", help="Add a full-width caption in the middle of each page")
+    args = parser.parse_args()
+    
+    paths = generate_corpus(args.out_dir, args.documents, args.pages, args.heading_density, args.fonts,
+                            args.columns, args.seed, args.toc, args.interleave, args.captions)
+    print(f"Wrote {len(paths)} PDFs to {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the Round 1A and Round 1B PDF pipelines
+"""
@@ -0,0 +1,437 @@
+"""
+Shared document model for the Round 1A and Round 1B pipelines
+Each PDF is parsed once into spans, lines and blocks; the outline JSON and the persona sections are both
+built from that model, and the model serializes to JSON so one parse (e.g. via the result cache) feeds both
+"""
+
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import os
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from pdf_common.layout import reading_order
+from pdf_common.metrics import NullMetrics, RunMetrics
+from pdf_common.result_cache import ResultCache
+
+MODEL_VERSION = "1"  # Bump when parsing output changes, to invalidate cached models
+
+# get_text("dict") flags per text backend. "dict" is PyMuPDF's default, which copies every image's pixels into
+# the result; "lite" drops image blocks (the model never reads them) and yields exactly the same spans
+TEXT_BACKENDS = {
+    "dict": fitz.TEXTFLAGS_DICT,
+    "lite": fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES,
+}
+DEFAULT_TEXT_BACKEND = "lite"
+
+def text_backend_from_env() -> str:
+    """Text backend chosen by TEXT_BACKEND (dict|lite)"""
+    backend = os.environ.get("TEXT_BACKEND", DEFAULT_TEXT_BACKEND)
+    if backend not in TEXT_BACKENDS:
+        raise ValueError(f"Unknown TEXT_BACKEND {backend!r} (expected one of {', '.join(TEXT_BACKENDS)})")
+    return backend
+
+def page_blocks(page: fitz.Page, backend: str = DEFAULT_TEXT_BACKEND) -> Dict:
+    """A page's get_text("dict") output, extracted with the given backend's flags"""
+    return page.get_text("dict", flags=TEXT_BACKENDS[backend])
+
+def page_triage(page: fitz.Page) -> Optional[str]:
+    """Why a page cannot hold any extractable text ("image" for scans and other image-only pages, "blank"),
+    or None when it may. Only the page dictionary is read on text pages, never the text layer"""
+    doc = page.parent
+    
+    # Text needs a font, so pages whose resources name one (or that inherit their resources) may have text
+    if doc.xref_get_key(page.xref, "Resources")[0] == "null" or \
+            doc.xref_get_key(page.xref, "Resources/Font")[0] != "null":
+        return None
+    
+    # Annotations and form XObjects carry resources of their own
+    if page.first_annot is not None or page.first_widget is not None or page.get_xobjects():
+        return None
+    
+    # Text operators with a missing font still extract (MuPDF substitutes one); scans have tiny content streams
+    if any(b"BT" in (doc.xref_stream(xref) or b"") for xref in page.get_contents()):
+        return None
+    return "image" if doc.xref_get_key(page.xref, "Resources/XObject")[0] != "null" else "blank"
+
+class SpanTable:
+    """Columnar store of text spans: NumPy columns, interned font names and one packed text buffer"""
+    
+    def __init__(self, text: str, offsets: np.ndarray, page: np.ndarray, size: np.ndarray,
+                 flags: np.ndarray, font_id: np.ndarray, fonts: List[str], bbox: np.ndarray):
+        self.text = text          # All span texts concatenated
+        self.offsets = offsets    # int64[n + 1]: span i is text[offsets[i]:offsets[i + 1]]
+        self.page = page          # int32[n], 1-based page numbers
+        self.size = size          # float64[n], font sizes (kept exact for comparisons)
+        self.flags = flags        # int32[n], PyMuPDF font flags
+        self.font_id = font_id    # int32[n], index into fonts
+        self.fonts = fonts        # Interned font names
+        self.bbox = bbox          # float32[n, 4]
+    
+    def __len__(self) -> int:
+        return len(self.page)
+    
+    def __getitem__(self, i: int) -> Dict:
+        """Materialize one span as the legacy element dict"""
+        return {
+            "text": self.span_text(i),
+            "page": int(self.page[i]),
+            "font_size": float(self.size[i]),
+            "font_flags": int(self.flags[i]),
+            "font_name": self.fonts[self.font_id[i]],
+            "bbox": tuple(float(v) for v in self.bbox[i])
+        }
+    
+    @property
+    def lengths(self) -> np.ndarray:
+        """Character length of every span"""
+        return np.diff(self.offsets)
+    
+    def span_text(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+    
+    def slice(self, start: int, stop: int) -> "SpanTable":
+        """Spans [start, stop) as a new table"""
+        offsets = self.offsets[start:stop + 1]
+        return SpanTable(
+            self.text[offsets[0]:offsets[-1]],
+            offsets - offsets[0],
+            self.page[start:stop],
+            self.size[start:stop],
+            self.flags[start:stop],
+            self.font_id[start:stop],
+            self.fonts,
+            self.bbox[start:stop]
+        )
+    
+    def take(self, indices: np.ndarray) -> "SpanTable":
+        """Selected spans, in the given order, as a new table"""
+        lengths = self.lengths[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        
+        return SpanTable(
+            "".join(self.span_text(i) for i in indices),
+            offsets,
+            self.page[indices],
+            self.size[indices],
+            self.flags[indices],
+            self.font_id[indices],
+            self.fonts,
+            self.bbox[indices]
+        )
+    
+    @classmethod
+    def concat(cls, tables: List["SpanTable"]) -> "SpanTable":
+        """Join tables (e.g. page-range shards) in order, re-interning font names"""
+        font_index = {}
+        font_ids = []
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        
+        for table in tables:
+            remap = np.array([font_index.setdefault(name, len(font_index)) for name in table.fonts],
+                             dtype=np.int32)
+            font_ids.append(remap[table.font_id] if len(table) else table.font_id)
+            offsets.append(table.offsets[1:] + base)
+            base += len(table.text)
+        fonts = list(font_index)
+        
+        return cls(
+            "".join(t.text for t in tables),
+            np.concatenate(offsets),
+            np.concatenate([t.page for t in tables] or [np.zeros(0, dtype=np.int32)]),
+            np.concatenate([t.size for t in tables] or [np.zeros(0)]),
+            np.concatenate([t.flags for t in tables] or [np.zeros(0, dtype=np.int32)]),
+            np.concatenate(font_ids or [np.zeros(0, dtype=np.int32)]),
+            fonts,
+            np.concatenate([t.bbox for t in tables] or [np.zeros((0, 4), dtype=np.float32)])
+        )
+
+class SpanTableBuilder:
+    """Accumulates spans into compact typed arrays before freezing them into a SpanTable"""
+    
+    def __init__(self):
+        self.texts = []
+        self.offsets = array('q', [0])
+        self.page = array('i')
+        self.size = array('d')
+        self.flags = array('i')
+        self.font_id = array('i')
+        self.font_index = {}
+        self.bbox = array('f')
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def add(self, text: str, page: int, size: float, flags: int, font: str, bbox: Tuple):
+        self.texts.append(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+        self.page.append(page)
+        self.size.append(size)
+        self.flags.append(flags)
+        self.font_id.append(self.font_index.setdefault(font, len(self.font_index)))
+        self.bbox.extend(bbox)
+    
+    def build(self) -> SpanTable:
+        return SpanTable(
+            "".join(self.texts),
+            np.frombuffer(self.offsets, dtype=np.int64),
+            np.frombuffer(self.page, dtype=np.int32),
+            np.frombuffer(self.size, dtype=np.float64),
+            np.frombuffer(self.flags, dtype=np.int32),
+            np.frombuffer(self.font_id, dtype=np.int32),
+            list(self.font_index),
+            np.frombuffer(self.bbox, dtype=np.float32).reshape(-1, 4)
+        )
+
+class DocumentModel:
+    """One parse of a PDF: non-empty spans grouped into lines and blocks, plus the detected outline once known"""
+    
+    def __init__(self, spans: SpanTable, line_start: np.ndarray, block_start: np.ndarray,
+                 block_page: np.ndarray, pages: np.ndarray, outline: Optional[Dict[str, Any]] = None):
+        self.spans = spans              # Stripped, non-empty spans in reading order
+        self.line_start = line_start    # int64[lines + 1]: line i is spans[line_start[i]:line_start[i + 1]]
+        self.block_start = block_start  # int64[blocks + 1]: block i is lines[block_start[i]:block_start[i + 1]]
+        self.block_page = block_page    # int32[blocks], 1-based page numbers
+        self.pages = pages              # int32[], 1-based numbers of the pages parsed (text or not)
+        self.outline = outline          # Round 1A title/outline, once detected
+    
+    @property
+    def block_count(self) -> int:
+        return len(self.block_page)
+    
+    @classmethod
+    def iter_pages(cls, doc: fitz.Document, page_range: Optional[Tuple[int, int]] = None,
+                   metrics: Optional[RunMetrics] = None, backend: str = DEFAULT_TEXT_BACKEND,
+                   triage: bool = True) -> Iterator["DocumentModel"]:
+        """Parse each page (optionally a [start, stop) page range) into its own model, loading pages on demand.
+        With triage, pages that cannot hold text (see page_triage) skip get_text and yield empty models."""
+        metrics = metrics or NullMetrics()
+        # Triage only pays off when get_text would copy the scans' pixels: the lite backend drops image blocks
+        # for free, so there it would cost its dictionary lookups and save nothing
+        triage = triage and bool(TEXT_BACKENDS[backend] & fitz.TEXT_PRESERVE_IMAGES)
+        start, stop = page_range if page_range else (0, len(doc))
+        
+        for page_num in range(start, stop):
+            with metrics.stage("triage"):
+                page = doc[page_num]
+                skipped = page_triage(page) if triage else None
+            
+            if skipped:
+                metrics.count("skipped_pages")
+                metrics.count(f"skipped_{skipped}_pages")
+                blocks = {"blocks": []}
+            else:
+                with metrics.stage("get_text"):
+                    blocks = page_blocks(page, backend)
+            
+            with metrics.stage("span_table"):
+                page_model = cls.from_blocks(blocks, page_num + 1)
+            
+            metrics.count("pages")
+            metrics.count("spans", len(page_model.spans))
+            yield page_model
+    
+    @classmethod
+    def parse(cls, doc: fitz.Document, page_range: Optional[Tuple[int, int]] = None,
+              metrics: Optional[RunMetrics] = None, backend: str = DEFAULT_TEXT_BACKEND,
+              triage: bool = True) -> "DocumentModel":
+        """Parse a whole document (optionally a [start, stop) page range) into one model"""
+        return cls.concat(list(cls.iter_pages(doc, page_range, metrics, backend, triage)))
+    
+    @classmethod
+    def from_blocks(cls, blocks: Dict, page: int) -> "DocumentModel":
+        """Model of one page from PyMuPDF's get_text("dict") output"""
+        spans = SpanTableBuilder()
+        line_start = array('q', [0])
+        block_start = array('q', [0])
+        block_page = array('i')
+        
+        for block in blocks["blocks"]:
+            if "lines" not in block:
+                continue
+            
+            for line in block["lines"]:
+                for span in line["spans"]:
+                    text = span["text"].strip()
+                    if text:
+                        spans.add(text, page, span["size"], span["flags"], span["font"], span["bbox"])
+                
+                # Lines and blocks without text are dropped
+                if len(spans) > line_start[-1]:
+                    line_start.append(len(spans))
+            
+            if len(line_start) - 1 > block_start[-1]:
+                block_start.append(len(line_start) - 1)
+                block_page.append(page)
+        
+        return cls(
+            spans.build(),
+            np.frombuffer(line_start, dtype=np.int64),
+            np.frombuffer(block_start, dtype=np.int64),
+            np.frombuffer(block_page, dtype=np.int32),
+            np.array([page], dtype=np.int32)
+        )
+    
+    @classmethod
+    def concat(cls, models: List["DocumentModel"]) -> "DocumentModel":
+        """Join models (pages or page-range shards) in order"""
+        line_start = [np.zeros(1, dtype=np.int64)]
+        block_start = [np.zeros(1, dtype=np.int64)]
+        span_base = line_base = 0
+        
+        for model in models:
+            line_start.append(model.line_start[1:] + span_base)
+            block_start.append(model.block_start[1:] + line_base)
+            span_base += len(model.spans)
+            line_base += len(model.line_start) - 1
+        
+        return cls(
+            SpanTable.concat([m.spans for m in models]),
+            np.concatenate(line_start),
+            np.concatenate(block_start),
+            np.concatenate([m.block_page for m in models] or [np.zeros(0, dtype=np.int32)]),
+            np.concatenate([m.pages for m in models] or [np.zeros(0, dtype=np.int32)])
+        )
+    
+    def page_models(self) -> Iterator["DocumentModel"]:
+        """Split back into one model per parsed page"""
+        for page in self.pages:
+            first, last = np.searchsorted(self.block_page, [page, page + 1])
+            lines = self.line_start[self.block_start[first]:self.block_start[last] + 1]
+            
+            yield DocumentModel(
+                self.spans.slice(lines[0], lines[-1]),
+                lines - lines[0],
+                self.block_start[first:last + 1] - self.block_start[first],
+                self.block_page[first:last],
+                np.array([page], dtype=np.int32)
+            )
+    
+    def block_spans(self, block: int) -> Tuple[int, int]:
+        """[start, stop) span range of a block"""
+        return (int(self.line_start[self.block_start[block]]),
+                int(self.line_start[self.block_start[block + 1]]))
+    
+    def block_text(self, block: int) -> str:
+        """Text of a block: spans joined by spaces, one line per text line"""
+        spans = self.spans
+        lines = self.line_start[self.block_start[block]:self.block_start[block + 1] + 1]
+        
+        text = []
+        for first, last in zip(lines[:-1], lines[1:]):
+            for i in range(first, last):
+                text.append(spans.span_text(i))
+                text.append(" ")
+            text.append("\n")
+        return "".join(text)
+    
+    def line_bboxes(self) -> np.ndarray:
+        """Bounding box of every line (the union of its spans' boxes), float[lines, 4]"""
+        if len(self.line_start) < 2:
+            return np.zeros((0, 4))
+        starts = self.line_start[:-1]
+        bbox = self.spans.bbox
+        return np.column_stack([np.minimum.reduceat(bbox[:, 0], starts), np.minimum.reduceat(bbox[:, 1], starts),
+                                np.maximum.reduceat(bbox[:, 2], starts), np.maximum.reduceat(bbox[:, 3], starts)])
+    
+    def in_reading_order(self) -> "DocumentModel":
+        """The model with each page's lines in reading order (see pdf_common.layout); blocks that mixed
+        columns are split, so every block stays within one column. One-column models come back as is."""
+        line_count = len(self.line_start) - 1
+        line_block = np.repeat(np.arange(self.block_count), np.diff(self.block_start))
+        line_page = self.block_page[line_block]
+        bboxes = self.line_bboxes()
+        
+        order, region = [], []
+        page_starts = np.flatnonzero(np.diff(line_page, prepend=-1))
+        for start, stop in zip(page_starts, np.append(page_starts[1:], line_count)):
+            page_order, page_region = reading_order(bboxes[start:stop])
+            order.append(start + page_order)
+            region.append(page_region[page_order])
+        if not order or all(not r.any() for r in region):
+            return self
+        order, region = np.concatenate(order), np.concatenate(region)
+        
+        # A block ends where the next line comes from another block or another column/band
+        line_block = line_block[order]
+        breaks = np.flatnonzero((line_block[1:] != line_block[:-1]) | (region[1:] != region[:-1])) + 1
+        
+        starts = self.line_start[order]
+        lengths = self.line_start[order + 1] - starts
+        span_order = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + \
+            np.arange(lengths.sum())
+        
+        return DocumentModel(
+            self.spans.take(span_order),
+            np.concatenate([[0], np.cumsum(lengths)]),
+            np.concatenate([[0], breaks, [line_count]]),
+            self.block_page[line_block[np.concatenate([[0], breaks])]],
+            self.pages,
+            self.outline
+        )
+    
+    def block_sizes(self, block: int) -> np.ndarray:
+        """Font sizes of a block's spans"""
+        start, stop = self.block_spans(block)
+        return self.spans.size[start:stop]
+    
+    @staticmethod
+    def cache_key(content_digest: str) -> str:
+        """Result cache key of a PDF's model (shared by both pipelines)"""
+        return ResultCache.make_key(content_digest, f"document_model/{MODEL_VERSION}", {})
+    
+    @classmethod
+    def from_cache(cls, cache: ResultCache, key: str) -> Optional["DocumentModel"]:
+        data = cache.get(key)
+        return cls.from_dict(data) if data is not None else None
+    
+    def to_cache(self, cache: ResultCache, key: str):
+        cache.put(key, self.to_dict())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form (floats round-trip exactly)"""
+        spans = self.spans
+        return {
+            "version": MODEL_VERSION,
+            "text": spans.text,
+            "offsets": spans.offsets.tolist(),
+            "page": spans.page.tolist(),
+            "size": spans.size.tolist(),
+            "flags": spans.flags.tolist(),
+            "font_id": spans.font_id.tolist(),
+            "fonts": spans.fonts,
+            "bbox": spans.bbox.ravel().tolist(),
+            "line_start": self.line_start.tolist(),
+            "block_start": self.block_start.tolist(),
+            "block_page": self.block_page.tolist(),
+            "pages": self.pages.tolist(),
+            "outline": self.outline
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DocumentModel":
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"Unsupported document model version {data.get('version')}")
+        
+        spans = SpanTable(
+            data["text"],
+            np.array(data["offsets"], dtype=np.int64),
+            np.array(data["page"], dtype=np.int32),
+            np.array(data["size"], dtype=np.float64),
+            np.array(data["flags"], dtype=np.int32),
+            np.array(data["font_id"], dtype=np.int32),
+            data["fonts"],
+            np.array(data["bbox"], dtype=np.float32).reshape(-1, 4)
+        )
+        return cls(
+            spans,
+            np.array(data["line_start"], dtype=np.int64),
+            np.array(data["block_start"], dtype=np.int64),
+            np.array(data["block_page"], dtype=np.int32),
+            np.array(data["pages"], dtype=np.int32),
+            data.get("outline")
+        )
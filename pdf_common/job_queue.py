@@ -0,0 +1,204 @@
+"""
+SQLite-backed job queue for multi-node batch runs over a shared directory
+Workers claim one PDF at a time under a lease they renew with heartbeats; when a worker dies its lease
+expires and another worker retries the job, up to max_attempts. Results are written atomically under a
+name fixed by the job, so a job that runs twice (a lease lost mid-run) just rewrites the same result.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',  -- pending, running, done or failed
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+)
+"""
+
+class Job(NamedTuple):
+    id: str        # File name
+    path: str      # As queued (on the enqueuing node)
+    attempts: int
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def write_json_atomic(path: Path, value: Any):
+    """Write JSON through a temporary file and a rename, so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+class JobQueue:
+    """Jobs in <queue_dir>/queue.db, results in <queue_dir>/results. The directory is shared by every node;
+    SQLite needs working POSIX locks on it, and lease times assume the nodes' clocks agree."""
+    
+    def __init__(self, queue_dir: str, lease_seconds: float = 60.0, max_attempts: int = 3):
+        self.queue_dir = Path(queue_dir)
+        self.results_dir = self.queue_dir / "results"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        with self.transaction() as db:
+            db.execute(SCHEMA)
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction on a fresh connection (safe from any thread or process)"""
+        db = sqlite3.connect(str(self.queue_dir / "queue.db"), timeout=60, isolation_level=None)
+        try:
+            db.execute("BEGIN IMMEDIATE")  # Take the write lock up front: claims never race
+            try:
+                yield db
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+    
+    def enqueue(self, paths: Iterable[Path]) -> int:
+        """Add a job per file (named by file name); files already queued are left alone. Returns jobs added"""
+        with self.transaction() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO jobs (id, path) VALUES (?, ?)",
+                           [(Path(path).name, str(path)) for path in paths])
+            return db.total_changes - before
+    
+    def claim(self, worker: str) -> Optional[Job]:
+        """Lease the next pending job, or one whose worker stopped heartbeating"""
+        now = time.time()
+        with self.transaction() as db:
+            # Expired leases out of attempts fail for good instead of being retried
+            db.execute("UPDATE jobs SET state = 'failed', worker = NULL, error = 'lease expired' "
+                       "WHERE state = 'running' AND lease_expires < ? AND attempts >= ?",
+                       (now, self.max_attempts))
+            row = db.execute("SELECT id, path, attempts FROM jobs "
+                             "WHERE state = 'pending' OR (state = 'running' AND lease_expires < ?) "
+                             "ORDER BY attempts, id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            job_id, path, attempts = row
+            db.execute("UPDATE jobs SET state = 'running', worker = ?, lease_expires = ?, attempts = ? "
+                       "WHERE id = ?", (worker, now + self.lease_seconds, attempts + 1, job_id))
+        if attempts:
+            logger.info(f"Retrying {job_id} (attempt {attempts + 1})")
+        return Job(job_id, path, attempts + 1)
+    
+    def heartbeat(self, job: Job, worker: str) -> bool:
+        """Extend the job's lease; False when the worker no longer holds it"""
+        with self.transaction() as db:
+            return db.execute("UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND state = 'running'",
+                              (time.time() + self.lease_seconds, job.id, worker)).rowcount > 0
+    
+    def complete(self, job: Job, worker: str):
+        """Mark the job done (even if its lease was lost: the result is already written)"""
+        with self.transaction() as db:
+            db.execute("UPDATE jobs SET state = 'done', worker = ?, lease_expires = NULL, error = NULL "
+                       "WHERE id = ? AND state != 'done'", (worker, job.id))
+    
+    def fail(self, job: Job, worker: str, error: str):
+        """Give the job back for a retry, or fail it for good after max_attempts"""
+        with self.transaction() as db:
+            db.execute("UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                       "worker = NULL, lease_expires = NULL, error = ? "
+                       "WHERE id = ? AND worker = ? AND state = 'running'",
+                       (self.max_attempts, error, job.id, worker))
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        with self.transaction() as db:
+            return dict(db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+    
+    def jobs(self, state: str) -> List[Job]:
+        """Jobs in a state, by id"""
+        with self.transaction() as db:
+            rows = db.execute("SELECT id, path, attempts FROM jobs WHERE state = ? ORDER BY id", (state,))
+            return [Job(*row) for row in rows.fetchall()]
+    
+    def drained(self) -> bool:
+        """Whether every job is done or failed"""
+        counts = self.counts()
+        return not counts.get("pending") and not counts.get("running")
+    
+    def result_path(self, job: Job) -> Path:
+        return self.results_dir / f"{job.id}.json"
+    
+    def write_result(self, job: Job, value: Any):
+        write_json_atomic(self.result_path(job), value)
+    
+    def read_result(self, job: Job) -> Any:
+        with open(self.result_path(job), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @contextmanager
+    def leased(self, job: Job, worker: str) -> Iterator[None]:
+        """Heartbeat the job's lease from a background thread while the block runs"""
+        stop = threading.Event()
+        
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.heartbeat(job, worker):
+                    logger.warning(f"Lost the lease on {job.id}; another worker may be running it")
+                    return
+        
+        thread = threading.Thread(target=beat, name=f"heartbeat-{job.id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+    
+    def wait_drained(self, poll_seconds: float = 1.0):
+        """Block until every job is done or failed"""
+        while not self.drained():
+            time.sleep(poll_seconds)
+    
+    def run_worker(self, handle: Callable[[Job], Any], worker: Optional[str] = None,
+                   poll_seconds: float = 1.0) -> int:
+        """Claim and handle jobs until the queue is drained; handle writes the job's result.
+        Returns the number of jobs this worker completed."""
+        worker = worker or default_worker_id()
+        completed = 0
+        while True:
+            job = self.claim(worker)
+            if job is None:
+                if self.drained():
+                    return completed
+                time.sleep(poll_seconds)  # Others hold leases; wait in case one of them expires
+                continue
+            
+            try:
+                with self.leased(job, worker):
+                    handle(job)
+            except Exception as e:
+                logger.error(f"Failed to process {job.id} (attempt {job.attempts}): {str(e)}")
+                self.fail(job, worker, str(e))
+                continue
+            
+            self.complete(job, worker)
+            completed += 1
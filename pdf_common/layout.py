@@ -0,0 +1,87 @@
+"""
+Layout analysis for text blocks: column detection and reading order
+Boxes are indexed by their x and y extents (sorted sweeps and binary search), so ordering a page is O(n log n)
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+MIN_GUTTER = 6.0               # Points of whitespace that separate two columns
+MAX_CROSSING_FRACTION = 0.05   # Share of boxes (titles, captions) that may cross a gutter
+MIN_COLUMN_BOXES = 2           # Boxes a column needs; stray ones (margin notes, page numbers) make no column
+MIN_COLUMN_WIDTH = 0.15        # Share of the text width a column needs; narrower strips are bullets or numbering
+MIN_FILLED_SHARE = 0.4         # Share of a column's boxes that must run up to its gutter (flowing text)
+FILL_TOLERANCE = 0.2           # Share of the column width a filled box may stop short of the gutter
+SPAN_TOLERANCE = 2.0           # Points a box may start left of its column (ragged left edges)
+
+def column_ranges(bboxes: np.ndarray) -> np.ndarray:
+    """[x0, x1] of each text column on a page, left to right (a single range for one-column layouts)"""
+    if not len(bboxes):
+        return np.zeros((0, 2))
+    x0, x1 = bboxes[:, 0], bboxes[:, 2]
+    left, right = float(x0.min()), float(x1.max())
+    
+    # Sweep the boxes' x extents: coverage[i] boxes cross the strip between edges[i] and edges[i + 1]
+    edges = np.concatenate([x0, x1])
+    order = np.argsort(edges, kind='stable')
+    edges = edges[order]
+    coverage = np.cumsum(np.where(order < len(bboxes), 1, -1))[:-1]
+    
+    # Gutters: runs of strips that (almost) nothing crosses, wide enough to read as whitespace
+    low = coverage <= max(1, int(MAX_CROSSING_FRACTION * len(bboxes)))
+    run_starts = np.flatnonzero(low & ~np.concatenate([[False], low[:-1]]))
+    run_stops = np.flatnonzero(low & ~np.concatenate([low[1:], [False]])) + 1
+    
+    # A gutter counts only with enough boxes and width on either side of it, centers looked up by binary search.
+    # The text before it must also flow up to it: the short keys of a key/value table leave a gutter too
+    by_center = np.argsort((x0 + x1) / 2, kind='stable')
+    centers, right_edges = ((x0 + x1) / 2)[by_center], x1[by_center]
+    min_width = MIN_COLUMN_WIDTH * (right - left)
+    ranges = []
+    column_left = left
+    for gutter_left, gutter_right in zip(edges[run_starts], edges[run_stops]):
+        if gutter_right - gutter_left < MIN_GUTTER:
+            continue
+        if gutter_left - column_left < min_width or right - gutter_right < min_width:
+            continue
+        first, stop = np.searchsorted(centers, column_left), np.searchsorted(centers, gutter_left)
+        after = len(centers) - np.searchsorted(centers, gutter_right)
+        if stop - first < MIN_COLUMN_BOXES or after < MIN_COLUMN_BOXES:
+            continue
+        filled = right_edges[first:stop] >= gutter_left - FILL_TOLERANCE * (gutter_left - column_left)
+        if filled.mean() >= MIN_FILLED_SHARE:
+            ranges.append([column_left, gutter_left])
+            column_left = gutter_right
+    ranges.append([column_left, right])
+    return np.array(ranges)
+
+def reading_order(bboxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Order of one page's boxes (lines or blocks) for reading, and the region of each box.
+    Columns are read top to bottom, left to right, restarting below every box that spans columns;
+    regions number those (band, column) cells. One-column pages keep their original order in region 0."""
+    columns = column_ranges(bboxes)
+    if len(columns) < 2:
+        return np.arange(len(bboxes)), np.zeros(len(bboxes), dtype=np.int64)
+    
+    # A box belongs to the column its left edge is in, and may span the columns its right edge reaches into
+    column_starts = columns[1:, 0]
+    x0, y0, x1, y1 = bboxes[:, 0], bboxes[:, 1], bboxes[:, 2], bboxes[:, 3]
+    first_column = np.searchsorted(column_starts, x0 + SPAN_TOLERANCE, side='right')
+    last_column = np.searchsorted(column_starts, x1 - SPAN_TOLERANCE, side='right')
+    spanning = last_column > first_column
+    
+    # Unless it runs into the text of those columns: then it is a heading overflowing its own column.
+    # Crossing boxes are rare (see MAX_CROSSING_FRACTION), so each is checked against the page directly
+    for i in np.flatnonzero(spanning):
+        later = (first_column > first_column[i]) & (first_column <= last_column[i]) & ~spanning
+        if np.any(later & (x0 < x1[i]) & (y0 < y1[i]) & (y1 > y0[i])):
+            spanning[i] = False
+    
+    # Spanning boxes cut the page into bands; every box belongs to the band of the last one above it
+    band_tops = np.sort(y0[spanning])
+    band = np.searchsorted(band_tops, y0, side='right')
+    column = np.where(spanning, -1, first_column)  # The spanning box opens its band
+    
+    region = band * (len(columns) + 1) + column + 1
+    return np.lexsort((x0, y0, column, band)), region
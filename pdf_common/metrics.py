@@ -0,0 +1,135 @@
+"""
+Stage-level run metrics for the PDF pipelines
+Wall/CPU timers per stage, counters and peak RSS, reported as JSON or Prometheus text
+"""
+
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+class RunMetrics:
+    """Per-run stage timers and counters"""
+    
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.started = time.time()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block of work; repeated stages accumulate"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.stages.setdefault(name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+            stats["calls"] += 1
+            stats["wall_seconds"] += time.perf_counter() - wall
+            stats["cpu_seconds"] += time.process_time() - cpu
+    
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+    
+    def merge(self, other: Dict[str, Any]):
+        """Fold in a report from another process (e.g. a pool worker)"""
+        for name, stats in other.get("stages", {}).items():
+            mine = self.stages.setdefault(name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+            for key in mine:
+                mine[key] += stats.get(key, 0)
+        for name, value in other.get("counters", {}).items():
+            self.count(name, value)
+    
+    @staticmethod
+    def peak_rss_bytes() -> int:
+        """Peak resident set size of this process and its finished children"""
+        scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is KiB on Linux, bytes on macOS
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return max(own, children) * scale
+    
+    def report(self) -> Dict[str, Any]:
+        return {
+            "pipeline": self.pipeline,
+            "started": self.started,
+            "wall_seconds": time.time() - self.started,
+            "peak_rss_bytes": self.peak_rss_bytes(),
+            "stages": self.stages,
+            "counters": self.counters
+        }
+    
+    def to_prometheus(self) -> str:
+        """Report in Prometheus text exposition format"""
+        report = self.report()
+        label = f'pipeline="{self.pipeline}"'
+        lines = [
+            "# TYPE pdf_run_wall_seconds gauge",
+            f"pdf_run_wall_seconds{{{label}}} {report['wall_seconds']:.6f}",
+            "# TYPE pdf_run_peak_rss_bytes gauge",
+            f"pdf_run_peak_rss_bytes{{{label}}} {report['peak_rss_bytes']}",
+        ]
+        for family, key in (("pdf_stage_calls_total", "calls"), ("pdf_stage_wall_seconds_total", "wall_seconds"),
+                            ("pdf_stage_cpu_seconds_total", "cpu_seconds")):
+            lines.append(f"# TYPE {family} counter")
+            for name, stats in sorted(self.stages.items()):
+                lines.append(f'{family}{{{label},stage="{name}"}} {stats[key]:.6g}')
+        lines.append("# TYPE pdf_items_total counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'pdf_items_total{{{label},item="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+    
+    def write(self, output_dir: str, fmt: str = "json") -> str:
+        """Write the report as run_metrics.json or run_metrics.prom; returns the file path"""
+        if fmt == "prometheus":
+            path = os.path.join(output_dir, "run_metrics.prom")
+            content = self.to_prometheus()
+        else:
+            path = os.path.join(output_dir, "run_metrics.json")
+            content = json.dumps(self.report(), indent=2)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+class NullMetrics(RunMetrics):
+    """Metrics sink that records nothing (instrumentation off)"""
+    
+    def __init__(self):
+        super().__init__("disabled")
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        yield
+    
+    def count(self, name: str, n: int = 1):
+        pass
+
+def metrics_from_env(pipeline: str) -> RunMetrics:
+    """Live metrics when METRICS (json | prometheus) or DEBUG=1 is set, else a no-op sink"""
+    if os.environ.get("METRICS") or debug_enabled():
+        return RunMetrics(pipeline)
+    return NullMetrics()
+
+def debug_enabled() -> bool:
+    return os.environ.get("DEBUG") == "1"
+
+@contextmanager
+def profiled(output_dir: str, name: str, enabled: Optional[bool] = None) -> Iterator[None]:
+    """cProfile the block and dump <name>.pstats into output_dir (on with DEBUG=1)"""
+    if enabled is None:
+        enabled = debug_enabled()
+    if not enabled:
+        yield
+        return
+    
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(output_dir, f"{name}.pstats"))
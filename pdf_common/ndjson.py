@@ -0,0 +1,69 @@
+"""
+Streaming NDJSON output for both pipelines
+Results are written one compact JSON record per line as they are produced, and every finished output gets a
+line in the batch manifest, so downstream consumers can follow a batch while it is still running
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+try:
+    import orjson  # Optional fast serializer
+except ImportError:
+    orjson = None
+
+OUTPUT_FORMATS = ("json", "ndjson")
+DEFAULT_OUTPUT_FORMAT = "json"
+MANIFEST_NAME = "manifest.jsonl"
+
+def output_format_from_env() -> str:
+    """Output format chosen by OUTPUT_FORMAT (json|ndjson)"""
+    output_format = os.environ.get("OUTPUT_FORMAT", DEFAULT_OUTPUT_FORMAT)
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown OUTPUT_FORMAT {output_format!r} (expected one of {', '.join(OUTPUT_FORMATS)})")
+    return output_format
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON (orjson when installed, else the standard library)"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class NDJSONWriter:
+    """One JSON record per line, flushed as written, so readers can follow the file while it grows.
+    The last record of a complete file has type "end"."""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = open(path, 'wb')
+    
+    def write(self, record_type: str, **fields: Any):
+        self.file.write(dumps({"type": record_type, **fields}) + b"\n")
+        self.file.flush()
+    
+    def close(self):
+        self.file.close()
+    
+    def __enter__(self) -> "NDJSONWriter":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+class Manifest:
+    """Batch manifest (manifest.jsonl in the output directory): one line per finished output.
+    Each line is a single O_APPEND write, so worker processes can share the file on a local filesystem."""
+    
+    def __init__(self, output_dir: str):
+        self.path = Path(output_dir) / MANIFEST_NAME
+    
+    def add(self, entry: Dict[str, Any]):
+        line = dumps({**entry, "finished": datetime.now().isoformat()}) + b"\n"
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
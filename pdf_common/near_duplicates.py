@@ -0,0 +1,142 @@
+"""
+Near-duplicate detection for headings, running headers/footers and sections
+SimHash fingerprints with an LSH band index find near-duplicates in roughly linear time
+"""
+
+import hashlib
+import math
+import re
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FINGERPRINT_BITS = 64
+SHINGLE_WORDS = 3
+
+_WORD = re.compile(r'\w+')
+_DIGITS = re.compile(r'\d+')
+
+def normalize_words(text: str, mask_digits: bool = False) -> List[str]:
+    """Words with case and punctuation folded (and digit runs masked as 0, e.g. for page numbers)"""
+    text = text.lower()
+    if mask_digits:
+        text = _DIGITS.sub('0', text)
+    return _WORD.findall(text)
+
+def normalize_text(text: str, mask_digits: bool = False) -> str:
+    """Case, punctuation and whitespace folded (and digit runs masked, e.g. for page numbers)"""
+    return " ".join(normalize_words(text, mask_digits))
+
+def _token_hashes(tokens: List[str]) -> np.ndarray:
+    """Stable 64-bit hash per token (independent of PYTHONHASHSEED, so fingerprints can be persisted)"""
+    return np.array([int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+                     for token in tokens], dtype=np.uint64)
+
+def simhash_fingerprints(texts: List[str], mask_digits: bool = False) -> np.ndarray:
+    """64-bit SimHash of each text over word shingles of its normalized words, as uint64"""
+    vocabulary: Dict[str, int] = {}
+    token_ids = []
+    offsets = [0]
+    for text in texts:
+        token_ids += [vocabulary.setdefault(word, len(vocabulary)) for word in normalize_words(text, mask_digits)]
+        offsets.append(len(token_ids))
+    
+    fingerprints = np.zeros(len(texts), dtype=np.uint64)
+    if not token_ids:
+        return fingerprints
+    
+    # Each word is hashed once; shingle hashes combine the hashes of their words by position
+    word_hashes = _token_hashes(list(vocabulary))[np.array(token_ids, dtype=np.int64)]
+    offsets = np.array(offsets, dtype=np.int64)
+    lengths = np.diff(offsets)
+    
+    shingles = []
+    multipliers = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for i in np.flatnonzero(lengths):
+            words = word_hashes[offsets[i]:offsets[i + 1]]
+            width = min(SHINGLE_WORDS, len(words))
+            count = len(words) - width + 1
+            combined = np.zeros(count, dtype=np.uint64)
+            for k in range(width):
+                combined ^= words[k:k + count] * multipliers[k]
+            shingles.append(combined)
+    shingle_counts = np.array([len(s) for s in shingles], dtype=np.int64)
+    shingle_starts = np.concatenate([[0], np.cumsum(shingle_counts)[:-1]])
+    shingles = np.concatenate(shingles)
+    
+    # Per text, each bit votes across its shingles; a majority of ones sets the fingerprint bit
+    bits = np.zeros(len(shingle_counts), dtype=np.uint64)
+    for bit in range(FINGERPRINT_BITS):
+        ones = np.add.reduceat((shingles >> np.uint64(bit)) & np.uint64(1), shingle_starts)
+        bits |= (2 * ones > shingle_counts).astype(np.uint64) << np.uint64(bit)
+    fingerprints[np.flatnonzero(lengths)] = bits
+    
+    # Texts without any words keep fingerprint 0 and are never treated as duplicates (see duplicate_of)
+    return fingerprints
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class SimHashIndex:
+    """LSH over fingerprint bands: fingerprints within max_distance bits share at least one whole band"""
+    
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1  # Pigeonhole: max_distance differing bits leave one band intact
+        self.band_bits = math.ceil(FINGERPRINT_BITS / self.bands)
+        self.buckets: Dict[Tuple[int, int], List[int]] = {}
+        self.fingerprints: List[int] = []
+    
+    def band_keys(self, fingerprint: int) -> Iterable[Tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield band, (fingerprint >> (band * self.band_bits)) & mask
+    
+    def query(self, fingerprint: int) -> Optional[int]:
+        """Id of the first indexed fingerprint within max_distance, if any"""
+        best = None
+        for key in self.band_keys(fingerprint):
+            for candidate in self.buckets.get(key, ()):
+                if (best is None or candidate < best) and \
+                        hamming_distance(fingerprint, self.fingerprints[candidate]) <= self.max_distance:
+                    best = candidate
+        return best
+    
+    def add(self, fingerprint: int) -> int:
+        """Index a fingerprint; returns its id"""
+        item = len(self.fingerprints)
+        self.fingerprints.append(fingerprint)
+        for key in self.band_keys(fingerprint):
+            self.buckets.setdefault(key, []).append(item)
+        return item
+
+def duplicate_of(fingerprints: np.ndarray, max_distance: int = 3) -> np.ndarray:
+    """For each fingerprint, the index of the earlier near-duplicate it collapses into, or -1"""
+    index = SimHashIndex(max_distance)
+    kept = []  # Index id -> position of the kept (first) occurrence
+    duplicates = np.full(len(fingerprints), -1, dtype=np.int64)
+    
+    for position, fingerprint in enumerate(fingerprints.tolist()):
+        if fingerprint == 0:
+            continue  # No words to compare
+        match = index.query(fingerprint)
+        if match is None:
+            index.add(fingerprint)
+            kept.append(position)
+        else:
+            duplicates[position] = kept[match]
+    return duplicates
+
+def running_threshold(page_count: int, min_pages: int = 3, min_fraction: float = 0.5) -> int:
+    """Pages a text must repeat on (at the same height) to count as a running header/footer"""
+    return max(min_pages, math.ceil(min_fraction * page_count))
+
+def repeated_keys(page_keys: Iterable[Iterable[Hashable]], page_count: int) -> set:
+    """Keys seen on at least running_threshold(page_count) pages (running headers/footers)"""
+    threshold = running_threshold(page_count)
+    pages_seen: Dict[Hashable, int] = {}
+    for keys in page_keys:
+        for key in set(keys):
+            pages_seen[key] = pages_seen.get(key, 0) + 1
+    return {key for key, count in pages_seen.items() if count >= threshold}
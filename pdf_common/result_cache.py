@@ -0,0 +1,137 @@
+"""
+Content-addressed on-disk cache for per-PDF extraction results
+Keys hash the PDF bytes together with the extractor version and parameters
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """JSON result cache with size-bounded LRU eviction, safe across worker processes"""
+    
+    RESCAN_WRITES = 256  # Writes between full scans, which also count other processes' entries
+    EVICT_TO = 0.9       # Share of max_bytes eviction frees down to, so a full cache is not rescanned every write
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.total_bytes: Optional[int] = None  # Size at the last scan plus this process's writes since
+        self.writes_since_scan = 0
+    
+    @classmethod
+    def from_env(cls) -> Optional["ResultCache"]:
+        """Cache configured by CACHE_DIR / CACHE_MAX_MB, or None when caching is off"""
+        cache_dir = os.environ.get("CACHE_DIR")
+        if not cache_dir:
+            return None
+        max_mb = int(os.environ.get("CACHE_MAX_MB", "512"))
+        return cls(cache_dir, max_mb * 1024 * 1024)
+    
+    @staticmethod
+    def file_digest(path: str) -> str:
+        """SHA-256 of a file's bytes"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def make_key(content_digest: str, namespace: str, params: Dict[str, Any]) -> str:
+        """Cache key for a document digest under an extractor namespace/version and parameters"""
+        payload = json.dumps({"content": content_digest, "namespace": namespace, "params": params},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None on a miss"""
+        path = self.entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            # Missing, evicted by another process, or a torn legacy entry
+            return None
+        
+        # Bump recency for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+    
+    def put(self, key: str, value: Any):
+        """Store value under key (atomic rename, so readers never see partial entries)"""
+        path = self.entry_path(key)
+        path.parent.mkdir(exist_ok=True)
+        
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+                written = f.tell()
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        
+        # Scan the directory only when the running size overflows, or now and then for other processes' writes
+        self.writes_since_scan += 1
+        if self.total_bytes is not None:
+            self.total_bytes += written - replaced
+        if (self.total_bytes is None or self.total_bytes > self.max_bytes
+                or self.writes_since_scan >= self.RESCAN_WRITES):
+            self.evict()
+    
+    def evict(self):
+        """Drop least recently used entries once the cache outgrows max_bytes, down to EVICT_TO of it"""
+        with open(self.cache_dir / ".lock", 'a') as lock:
+            # One evicting process at a time; readers and writers never block
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                entries = []
+                total = 0
+                for path in self.cache_dir.glob("*/*.json"):
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+                
+                self.writes_since_scan = 0
+                self.total_bytes = total
+                if total <= self.max_bytes:
+                    return
+                
+                entries.sort(key=lambda e: e[0])
+                for _, size, path in entries:
+                    if total <= self.EVICT_TO * self.max_bytes:
+                        break
+                    try:
+                        path.unlink()
+                        total -= size
+                    except OSError:
+                        pass
+                self.total_bytes = total
+                logger.debug(f"Cache evicted down to {total} bytes")
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
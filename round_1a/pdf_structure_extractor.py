@@ -4,193 +4,558 @@ PDF Structure Extractor for Adobe Hackathon Round 1A
 Extracts title and hierarchical headings (H1, H2, H3) from PDF documents
 """
 
-import json
 import os
 import sys
 from pathlib import Path
 import re
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 import logging
+from array import array
 
 # Core libraries
 import fitz  # PyMuPDF
 import numpy as np
-from collections import defaultdict, Counter
+from concurrent.futures import as_completed
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+if __name__ == "__main__":
+    # Run as a script from a checkout: shared helpers live in pdf_common/ at the repository root
+    # (next to this script in the container, so already importable there)
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from pdf_common.document_model import DEFAULT_TEXT_BACKEND, DocumentModel, SpanTable, text_backend_from_env
+from pdf_common.job_queue import Job, JobQueue, write_json_atomic
+from pdf_common.ndjson import DEFAULT_OUTPUT_FORMAT, Manifest, NDJSONWriter, output_format_from_env
+from pdf_common.near_duplicates import normalize_text, running_threshold
+from pdf_common.metrics import NullMetrics, RunMetrics, debug_enabled, metrics_from_env, profiled
+from pdf_common.result_cache import ResultCache
+
+# Configure logging (DEBUG=1 for verbose output)
+logging.basicConfig(level=logging.DEBUG if debug_enabled() else logging.INFO)
 logger = logging.getLogger(__name__)
 
-class PDFStructureExtractor:
+BOLD_FLAG = 2**4  # PyMuPDF span flag for bold text
+
+# Heading patterns, compiled once into a single alternation
+HEADING_PATTERNS = [
+    r'^\d+\.?\s+[A-Z]',  # Numbered headings
+    r'^[A-Z][A-Z\s]+$',  # ALL CAPS
+    r'^[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*$',  # Title Case
+    r'^(?:Chapter|Section|Part)\s+\d+',  # Chapter/Section markers
+    r'^\d+\.\d+\s+',  # Subsection numbers
+]
+HEADING_PATTERN = re.compile("|".join(f"(?:{pattern})" for pattern in HEADING_PATTERNS))
+
+HEADING_LEVELS = np.array(["H1", "H2", "H3"])
+
+class FontStatistics:
+    """Incremental font-size statistics: running mean and a size histogram"""
+    
     def __init__(self):
-        self.font_size_threshold = 2.0  # Minimum difference for heading detection
-        self.min_heading_size = 10.0    # Minimum font size for headings
-        self.max_heading_length = 200   # Maximum character length for headings
+        self.count = 0
+        self.mean = 0.0
+        self.histogram = {}  # size -> count, in first-seen order
+    
+    def update(self, sizes: np.ndarray):
+        if not len(sizes):
+            return
         
-    def extract_text_with_properties(self, doc: fitz.Document) -> List[Dict]:
-        """Extract text with font properties from PDF"""
-        text_elements = []
+        values, first_index, counts = np.unique(sizes, return_index=True, return_counts=True)
+        for i in np.argsort(first_index):
+            size = float(values[i])
+            self.histogram[size] = self.histogram.get(size, 0) + int(counts[i])
         
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            blocks = page.get_text("dict")
-            
-            for block in blocks["blocks"]:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            text = span["text"].strip()
-                            if text and len(text) > 1:
-                                text_elements.append({
-                                    "text": text,
-                                    "page": page_num + 1,
-                                    "font_size": span["size"],
-                                    "font_flags": span["flags"],
-                                    "font_name": span["font"],
-                                    "bbox": span["bbox"]
-                                })
-        
-        return text_elements
-    
-    def is_likely_heading(self, element: Dict, avg_font_size: float, common_font_size: float) -> bool:
-        """Determine if a text element is likely a heading"""
-        text = element["text"]
-        font_size = element["font_size"]
-        font_flags = element["font_flags"]
-        
-        # Skip if text is too long
-        if len(text) > self.max_heading_length:
-            return False
+        self.count += len(sizes)
+        self.mean += (float(np.sum(sizes)) - len(sizes) * self.mean) / self.count
+    
+    @property
+    def most_common(self) -> float:
+        """Most frequent size; ties go to the size seen first (like Counter.most_common)"""
+        return max(self.histogram, key=self.histogram.get)
+
+class OutlineBuilder:
+    """Builds title and outline from span batches in page order, keeping only heading candidates"""
+    
+    TITLE_PAGES = 2  # Title is looked for on the first pages
+    
+    def __init__(self, extractor: "PDFStructureExtractor"):
+        self.extractor = extractor
+        self.stats = FontStatistics()
+        self.title_size = None
+        self.title_text = None
+        self.title_final = False
+        
+        # Heading candidates in document order
+        self.texts = []
+        self.pages = array('i')
+        self.sizes = array('d')
+        self.definite = array('b')
+        self.keys = []               # Dedupe key of each candidate (see PDFStructureExtractor.heading_key)
+        self.running_keys = []       # Running header/footer key of each candidate
+        self.seen_definite = set()   # (key, running key) of candidates that are headings whatever the statistics
+        self.seen_size_only = set()  # (key, running key, size) of candidates that depend on the size threshold
+        
+        # Pages each (digit-masked text, height) occurs on, before dedupe, to spot running headers/footers
+        self.running_pages = {}      # running key -> [last page, page count]
+        self.last_page = 0
+    
+    def add(self, spans: SpanTable) -> Optional[str]:
+        """Add the next batch of spans; returns the title when it becomes final"""
+        self.stats.update(spans.size)
+        
+        title = None
+        if not self.title_final and len(spans):
+            # Largest font on the first pages (first one wins ties)
+            first_page_spans = np.flatnonzero(spans.page <= self.TITLE_PAGES)
+            if len(first_page_spans):
+                best = first_page_spans[np.argmax(spans.size[first_page_spans])]
+                if self.title_size is None or spans.size[best] > self.title_size:
+                    self.title_size = spans.size[best]
+                    self.title_text = spans.span_text(best)
             
-        # Skip if font size is too small
-        if font_size < self.min_heading_size:
-            return False
+            if spans.page[-1] > self.TITLE_PAGES:
+                self.title_final = True
+                title = self.title()
+        
+        if len(spans):
+            self.last_page = max(self.last_page, int(spans.page[-1]))
+        
+        candidates, definite = self.extractor.heading_candidates(spans)
+        for i in np.flatnonzero(candidates):
+            text = spans.span_text(i)
+            key = self.extractor.heading_key(text)
             
-        # Check if font size is significantly larger than average
-        size_threshold = max(avg_font_size + self.font_size_threshold, common_font_size + 1.0)
-        if font_size >= size_threshold:
-            return True
+            running_key = None
+            if self.extractor.dedupe:
+                running_key = (normalize_text(text, mask_digits=True), round(float(spans.bbox[i, 1])))
+                seen = self.running_pages.setdefault(running_key, [0, 0])
+                if seen[0] != spans.page[i]:
+                    seen[0] = spans.page[i]
+                    seen[1] += 1
             
-        # Check if text has bold formatting
-        if font_flags & 2**4:  # Bold flag
-            return True
+            # An earlier heading with the same (near-duplicate) text always wins the dedupe. Only one at the same
+            # height is dropped here: it shares the earlier one's fate as a running header, which finish decides
+            if (key, running_key) in self.seen_definite:
+                continue
+            if definite[i]:
+                self.seen_definite.add((key, running_key))
+            else:
+                size_key = (key, running_key, spans.size[i])
+                if size_key in self.seen_size_only:
+                    continue
+                self.seen_size_only.add(size_key)
             
-        # Check heading patterns
-        heading_patterns = [
-            r'^\d+\.?\s+[A-Z]',  # Numbered headings
-            r'^[A-Z][A-Z\s]+$',  # ALL CAPS
-            r'^[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*$',  # Title Case
-            r'^(Chapter|Section|Part)\s+\d+',  # Chapter/Section markers
-            r'^\d+\.\d+\s+',  # Subsection numbers
-        ]
-        
-        for pattern in heading_patterns:
-            if re.match(pattern, text):
-                return True
-                
-        return False
-    
-    def extract_title(self, text_elements: List[Dict]) -> str:
-        """Extract document title"""
-        # Look for title on first few pages
-        first_page_elements = [e for e in text_elements if e["page"] <= 2]
+            self.texts.append(text)
+            self.keys.append(key)
+            self.running_keys.append(running_key)
+            self.pages.append(spans.page[i])
+            self.sizes.append(spans.size[i])
+            self.definite.append(definite[i])
         
-        if not first_page_elements:
+        return title
+    
+    def title(self) -> str:
+        if self.title_text is None:
             return "Untitled Document"
-            
-        # Find element with largest font size on first page
-        title_candidate = max(first_page_elements, key=lambda x: x["font_size"])
+        return self.extractor.clean_title(self.title_text)
+    
+    def finish(self) -> Dict[str, Any]:
+        """Final title and outline once every span has been added"""
+        if not self.stats.count:
+            return {"title": "Empty Document", "outline": []}
+        
+        # Candidates whose size clears the threshold of the whole document
+        sizes = np.frombuffer(self.sizes, dtype=np.float64)
+        threshold = self.extractor.size_threshold(self.stats.mean, self.stats.most_common)
+        headings = np.flatnonzero(np.frombuffer(self.definite, dtype=np.int8).astype(bool) | (sizes >= threshold))
+        
+        # Running headers/footers repeat at the same height on many pages: they are not headings
+        min_pages = running_threshold(self.last_page)
+        running = {key for key, (_, pages) in self.running_pages.items() if pages >= min_pages}
+        
+        # Remove (near-)duplicates while preserving order
+        unique_headings = []
+        seen_keys = set()
+        for i in headings:
+            if self.keys[i] not in seen_keys and self.running_keys[i] not in running:
+                unique_headings.append(i)
+                seen_keys.add(self.keys[i])
+        
+        # Classify levels from the unique headings' font sizes
+        levels = self.extractor.heading_levels(sizes[unique_headings])
         
-        # Additional title validation
-        title_text = title_candidate["text"]
+        # Build outline
+        outline = []
+        for i, level in zip(unique_headings, levels):
+            outline.append({
+                "level": level,
+                "text": self.texts[i],
+                "page": self.pages[i]
+            })
         
-        # Clean up title
+        return {
+            "title": self.title(),
+            "outline": outline
+        }
+
+class PDFStructureExtractor:
+    VERSION = "4"  # Bump when extraction output changes, to invalidate cached outlines
+    
+    def __init__(self, cache: Optional[ResultCache] = None, metrics: Optional[RunMetrics] = None,
+                 use_toc: bool = True, text_backend: str = DEFAULT_TEXT_BACKEND, dedupe: bool = True):
+        self.font_size_threshold = 2.0  # Minimum difference for heading detection
+        self.min_heading_size = 10.0    # Minimum font size for headings
+        self.max_heading_length = 200   # Maximum character length for headings
+        self.use_toc = use_toc          # Take the outline from embedded bookmarks when the PDF has them
+        self.text_backend = text_backend  # get_text flags (see pdf_common.document_model.TEXT_BACKENDS)
+        self.dedupe = dedupe            # Fold near-duplicate headings and drop running headers/footers
+        self.cache = cache              # Optional on-disk outline cache
+        self.metrics = metrics or NullMetrics()
+    
+    def iter_page_models(self, doc: fitz.Document,
+                         page_range: Optional[Tuple[int, int]] = None) -> Iterator[DocumentModel]:
+        """Parse each page (optionally a [start, stop) page range) into the shared document model"""
+        return DocumentModel.iter_pages(doc, page_range, self.metrics, self.text_backend)
+    
+    def outline_spans(self, model: DocumentModel) -> SpanTable:
+        """Spans the outline is built from, in reading order (single characters are never headings or titles)"""
+        spans = model.in_reading_order().spans
+        return spans.take(np.flatnonzero(spans.lengths > 1))
+    
+    def iter_page_spans(self, doc: fitz.Document,
+                        page_range: Optional[Tuple[int, int]] = None) -> Iterator[SpanTable]:
+        """Yield the outline spans of each page (optionally a [start, stop) page range), loading pages on demand"""
+        for page_model in self.iter_page_models(doc, page_range):
+            yield self.outline_spans(page_model)
+    
+    def extract_text_with_properties(self, doc: fitz.Document,
+                                     page_range: Optional[Tuple[int, int]] = None) -> SpanTable:
+        """Extract text with font properties from PDF (optionally a [start, stop) page range)"""
+        return SpanTable.concat(list(self.iter_page_spans(doc, page_range)))
+    
+    def heading_candidates(self, spans: SpanTable) -> Tuple[np.ndarray, np.ndarray]:
+        """Masks of heading candidates, and of candidates that are headings whatever the font statistics"""
+        # Skip text that is too long or set in too small a font
+        candidates = (spans.lengths <= self.max_heading_length) & (spans.size >= self.min_heading_size)
+        
+        # Bold formatting
+        definite = candidates & ((spans.flags & BOLD_FLAG) != 0)
+        
+        # Check heading patterns on the remaining candidates
+        remaining = np.flatnonzero(candidates & ~definite)
+        match = HEADING_PATTERN.match
+        text, offsets = spans.text, spans.offsets
+        matched = [match(text[offsets[i]:offsets[i + 1]]) is not None for i in remaining]
+        definite[remaining[np.array(matched, dtype=bool)]] = True
+        
+        return candidates, definite
+    
+    def size_threshold(self, avg_font_size: float, common_font_size: float) -> float:
+        """Font size from which a candidate counts as a heading on size alone"""
+        return max(avg_font_size + self.font_size_threshold, common_font_size + 1.0)
+    
+    def heading_mask(self, spans: SpanTable, avg_font_size: float, common_font_size: float) -> np.ndarray:
+        """Boolean mask of spans that are likely headings"""
+        candidates, definite = self.heading_candidates(spans)
+        return definite | (candidates & (spans.size >= self.size_threshold(avg_font_size, common_font_size)))
+    
+    def heading_key(self, text: str) -> str:
+        """Key headings are deduplicated on: case, punctuation and spacing folded when dedupe is on"""
+        if not self.dedupe:
+            return text
+        return normalize_text(text) or text
+    
+    def clean_title(self, title_text: str) -> str:
+        """Tidy the title candidate's text"""
         title_text = re.sub(r'^\d+\.?\s*', '', title_text)  # Remove leading numbers
         title_text = title_text.strip()
         
         return title_text if title_text else "Untitled Document"
     
-    def classify_heading_level(self, element: Dict, font_size_levels: List[float]) -> str:
-        """Classify heading level based on font size"""
-        font_size = element["font_size"]
-        
-        # Sort font sizes in descending order
-        sorted_sizes = sorted(font_size_levels, reverse=True)
+    def heading_levels(self, heading_sizes: np.ndarray) -> List[str]:
+        """Classify heading levels based on font size: largest is H1, next H2, the rest H3"""
+        if not len(heading_sizes):
+            return []
         
-        if len(sorted_sizes) == 1:
-            return "H1"
-        elif len(sorted_sizes) == 2:
-            return "H1" if font_size == sorted_sizes[0] else "H2"
-        else:
-            if font_size == sorted_sizes[0]:
-                return "H1"
-            elif font_size == sorted_sizes[1]:
-                return "H2"
-            else:
-                return "H3"
+        # One size-to-level lookup for all headings: rank 0 is the largest distinct size
+        distinct_sizes = np.unique(heading_sizes)
+        rank = len(distinct_sizes) - 1 - np.searchsorted(distinct_sizes, heading_sizes)
+        return HEADING_LEVELS[np.minimum(rank, 2)].tolist()
+    
+    def cache_key(self, pdf_path: str, digest: Optional[str] = None) -> Optional[str]:
+        """Cache key for a PDF's outline under the current version and parameters"""
+        if self.cache is None:
+            return None
+        params = {
+            "font_size_threshold": self.font_size_threshold,
+            "min_heading_size": self.min_heading_size,
+            "max_heading_length": self.max_heading_length,
+            "use_toc": self.use_toc,
+            "dedupe": self.dedupe
+        }
+        digest = digest or ResultCache.file_digest(pdf_path)
+        return self.cache.make_key(digest, f"round1a.outline/{self.VERSION}", params)
+    
+    def model_key(self, pdf_path: str, digest: Optional[str] = None) -> Optional[str]:
+        """Cache key for a PDF's shared document model (also read and written by Round 1B)"""
+        if self.cache is None:
+            return None
+        return DocumentModel.cache_key(digest or ResultCache.file_digest(pdf_path))
+    
+    def cached_model(self, model_key: Optional[str]) -> Optional[DocumentModel]:
+        """Previously parsed document model, if cached"""
+        return DocumentModel.from_cache(self.cache, model_key) if model_key else None
+    
+    def store_model(self, model_key: Optional[str], model: DocumentModel, result: Dict[str, Any]):
+        """Cache the model together with its outline (rewritten only when the outline changed)"""
+        if model_key and model.outline != result:
+            model.outline = result
+            model.to_cache(self.cache, model_key)
+    
+    def cached_outline(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Previously extracted outline, if cached"""
+        return self.cache.get(cache_key) if cache_key else None
+    
+    def store_outline(self, cache_key: Optional[str], result: Dict[str, Any]):
+        if cache_key:
+            self.cache.put(cache_key, result)
     
     def extract_outline(self, pdf_path: str) -> Dict[str, Any]:
         """Extract structured outline from PDF"""
+        return self.try_extract_outline(pdf_path)[0]
+    
+    def try_extract_outline(self, pdf_path: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Outline and None, or error_result() and the error message when the PDF could not be processed"""
         try:
-            doc = fitz.open(pdf_path)
-            text_elements = self.extract_text_with_properties(doc)
-            
-            if not text_elements:
-                return {"title": "Empty Document", "outline": []}
-            
-            # Calculate font statistics
-            font_sizes = [e["font_size"] for e in text_elements]
-            avg_font_size = np.mean(font_sizes)
-            common_font_size = Counter(font_sizes).most_common(1)[0][0]
-            
-            # Extract title
-            title = self.extract_title(text_elements)
-            
-            # Filter potential headings
-            headings = []
-            for element in text_elements:
-                if self.is_likely_heading(element, avg_font_size, common_font_size):
-                    headings.append(element)
-            
-            # Remove duplicates while preserving order
-            unique_headings = []
-            seen_texts = set()
-            for heading in headings:
-                if heading["text"] not in seen_texts:
-                    unique_headings.append(heading)
-                    seen_texts.add(heading["text"])
-            
-            # Get unique font sizes for level classification
-            heading_font_sizes = list(set([h["font_size"] for h in unique_headings]))
-            
-            # Build outline
-            outline = []
-            for heading in unique_headings:
-                level = self.classify_heading_level(heading, heading_font_sizes)
+            result = {"title": "", "outline": []}
+            for kind, value in self.iter_outline(pdf_path):
+                if kind == "title":
+                    result["title"] = value
+                else:
+                    result["outline"].append(value)
+            return result, None
+        
+        except Exception as e:
+            logger.error(f"Error processing {pdf_path}: {str(e)}")
+            self.metrics.count("errors")
+            return self.error_result(), str(e)
+    
+    def toc_outline(self, doc: fitz.Document) -> Optional[List[Dict[str, Any]]]:
+        """Outline from the PDF's embedded bookmarks, or None when it has none (or use_toc is off)"""
+        if not self.use_toc:
+            return None
+        
+        outline = []
+        for level, text, page in doc.get_toc(simple=True):
+            text = text.strip()
+            # Bookmarks without a target page are not part of the outline
+            if text and page >= 1:
                 outline.append({
-                    "level": level,
-                    "text": heading["text"],
-                    "page": heading["page"]
+                    "level": str(HEADING_LEVELS[min(level, len(HEADING_LEVELS)) - 1]),
+                    "text": text,
+                    "page": page
                 })
+        return outline or None
+    
+    def extract_title(self, doc: fitz.Document) -> str:
+        """Title from the first pages alone, loading nothing past them"""
+        builder = OutlineBuilder(self)
+        for spans in self.iter_page_spans(doc, (0, min(OutlineBuilder.TITLE_PAGES, len(doc)))):
+            builder.add(spans)
+        return builder.title()
+    
+    def extract_toc_outline(self, pdf_path: str) -> Optional[Dict[str, Any]]:
+        """Title and outline of a bookmarked PDF without span-level heading detection, else None"""
+        with self.metrics.stage("open"):
+            doc = fitz.open(pdf_path)
+        with doc:
+            with self.metrics.stage("toc"):
+                outline = self.toc_outline(doc)
+            if outline is None:
+                return None
+            title = self.extract_title(doc)
+        
+        self.metrics.count("documents")
+        self.metrics.count("toc_outlines")
+        self.metrics.count("headings", len(outline))
+        return {"title": title, "outline": outline}
+    
+    def finish_outline(self, builder: OutlineBuilder) -> Dict[str, Any]:
+        with self.metrics.stage("heading_detection"):
+            result = builder.finish()
+        self.metrics.count("documents")
+        self.metrics.count("headings", len(result["outline"]))
+        return result
+    
+    def iter_outline(self, pdf_path: str) -> Iterator[Tuple[str, Any]]:
+        """Stream ("title", text) as soon as the title is final, then ("heading", entry) per outline entry.
+        Cached and bookmarked outlines stream at once; detected headings follow the last page, since their
+        levels depend on every heading's size. Errors propagate (see extract_outline)."""
+        digest = ResultCache.file_digest(pdf_path) if self.cache is not None else None
+        cache_key = self.cache_key(pdf_path, digest)
+        cached = self.cached_outline(cache_key)
+        if cached is not None:
+            logger.info(f"Cache hit for {pdf_path}")
+            self.metrics.count("cache_hits")
+            yield from self.outline_events(cached)
+            return
+        
+        # Bookmarked PDFs: outline from the embedded TOC, title from the first pages only
+        result = self.extract_toc_outline(pdf_path)
+        if result is not None:
+            self.store_outline(cache_key, result)
+            yield from self.outline_events(result)
+            return
+        
+        # A document model parsed earlier (by either pipeline) skips the parse
+        model_key = self.model_key(pdf_path, digest)
+        model = self.cached_model(model_key)
+        title_sent = False
+        if model is not None:
+            logger.info(f"Document model cache hit for {pdf_path}")
+            self.metrics.count("model_cache_hits")
+            result = self.build_outline(model)
+        else:
+            # Page-at-a-time: only heading candidates outlive their page, unless the model is cached
+            builder = OutlineBuilder(self)
+            pages = []
+            with self.metrics.stage("open"):
+                doc = fitz.open(pdf_path)
+            with doc:
+                for page_model in self.iter_page_models(doc):
+                    with self.metrics.stage("heading_detection"):
+                        title = builder.add(self.outline_spans(page_model))
+                    if model_key:
+                        pages.append(page_model)
+                    if title is not None:
+                        title_sent = True
+                        yield "title", title
             
-            doc.close()
-            
-            return {
-                "title": title,
-                "outline": outline
-            }
-            
-        except Exception as e:
-            logger.error(f"Error processing {pdf_path}: {str(e)}")
-            return {"title": "Error Processing Document", "outline": []}
+            result = self.finish_outline(builder)
+            if model_key:
+                model = DocumentModel.concat(pages)
+        
+        if model is not None:
+            self.store_model(model_key, model, result)
+        self.store_outline(cache_key, result)
+        yield from self.outline_events(result, title_sent)
+    
+    def outline_events(self, result: Dict[str, Any], title_sent: bool = False) -> Iterator[Tuple[str, Any]]:
+        """A finished result as iter_outline events"""
+        if not title_sent:
+            yield "title", result["title"]
+        for entry in result["outline"]:
+            yield "heading", entry
+    
+    def build_outline(self, model: DocumentModel) -> Dict[str, Any]:
+        """Build title and outline from an already parsed document model"""
+        builder = OutlineBuilder(self)
+        with self.metrics.stage("heading_detection"):
+            builder.add(self.outline_spans(model))
+        return self.finish_outline(builder)
+    
+    def error_result(self) -> Dict[str, Any]:
+        """Result written for documents that could not be processed"""
+        return {"title": "Error Processing Document", "outline": []}
+
+def _task_metrics(extractor: PDFStructureExtractor) -> bool:
+    """Give a pool task its own metrics, so the parent can merge them without double counting"""
+    if isinstance(extractor.metrics, NullMetrics):
+        return False
+    extractor.metrics = RunMetrics(extractor.metrics.pipeline)
+    return True
 
-def process_pdfs(input_dir: str, output_dir: str):
-    """Process all PDFs in input directory"""
-    extractor = PDFStructureExtractor()
+def _extract_shard(extractor: PDFStructureExtractor, pdf_path: str, start: int,
+                   stop: int) -> Tuple[DocumentModel, Optional[Dict]]:
+    """Worker task: parse pages [start, stop) of a PDF into a document model, plus the task's metrics"""
+    measured = _task_metrics(extractor)
+    with extractor.metrics.stage("open"):
+        doc = fitz.open(pdf_path)
+    try:
+        model = DocumentModel.parse(doc, (start, stop), extractor.metrics, extractor.text_backend)
+    finally:
+        doc.close()
+    return model, extractor.metrics.report() if measured else None
+
+def _extract_outline(extractor: PDFStructureExtractor,
+                     pdf_path: str) -> Tuple[Dict[str, Any], Optional[str], Optional[Dict]]:
+    """Worker task: extract the outline of a whole PDF, plus its error message (None on success) and the task's
+    metrics"""
+    measured = _task_metrics(extractor)
+    result, error = extractor.try_extract_outline(pdf_path)
+    return result, error, extractor.metrics.report() if measured else None
+
+def write_result(result: Dict[str, Any], output_file: Path, metrics: Optional[RunMetrics] = None):
+    """Save an outline result as JSON (atomically, so a rerun of the same file never leaves it torn)"""
+    with (metrics or NullMetrics()).stage("json_write"):
+        write_json_atomic(output_file, result)
+    
+    logger.info(f"Generated {output_file.name}")
+
+class OutlineOutput:
+    """Where outlines go: <stem>.json documents, or with ndjson <stem>.jsonl record streams (a title record,
+    one record per heading, then an end record) each listed in the batch manifest once complete"""
+    
+    def __init__(self, extractor: PDFStructureExtractor, output_dir: str, output_format: str = DEFAULT_OUTPUT_FORMAT):
+        self.extractor = extractor
+        self.output_path = Path(output_dir)
+        self.output_path.mkdir(exist_ok=True)
+        self.output_format = output_format
+        self.manifest = Manifest(output_dir) if output_format == "ndjson" else None
+    
+    def process(self, pdf_file: Path):
+        """Extract a PDF's outline and write it, streaming headings as they are produced with ndjson"""
+        if self.manifest is None:
+            self.write(pdf_file, self.extractor.extract_outline(str(pdf_file)))
+        else:
+            self.write_stream(pdf_file, self.extractor.iter_outline(str(pdf_file)))
+    
+    def write(self, pdf_file: Path, result: Dict[str, Any], error: Optional[str] = None):
+        """Write a finished outline (error_result() and its message for a PDF that failed)"""
+        if self.manifest is None:
+            write_result(result, self.output_path / f"{pdf_file.stem}.json", self.extractor.metrics)
+        else:
+            self.write_stream(pdf_file, self.extractor.outline_events(result), error)
+    
+    def write_stream(self, pdf_file: Path, events: Iterable[Tuple[str, Any]], error: Optional[str] = None):
+        """Write iter_outline events as they come; a failure mid-stream (or an error already caught) ends the
+        file with an error record"""
+        output_file = self.output_path / f"{pdf_file.stem}.jsonl"
+        title_sent = False
+        headings = 0
+        with NDJSONWriter(output_file) as writer:
+            try:
+                for kind, value in events:
+                    if kind == "title":
+                        writer.write("title", text=value)
+                        title_sent = True
+                    else:
+                        writer.write("heading", **value)
+                        headings += 1
+            except Exception as e:
+                logger.error(f"Error processing {pdf_file}: {str(e)}")
+                self.extractor.metrics.count("errors")
+                if not title_sent:
+                    writer.write("title", text=self.extractor.error_result()["title"])
+                error = str(e)
+            if error is not None:
+                writer.write("error", message=error)
+            status = "ok" if error is None else "error"
+            writer.write("end", status=status, headings=headings)
+        
+        self.manifest.add({"document": pdf_file.name, "output": output_file.name, "status": status,
+                           "headings": headings})
+        logger.info(f"Generated {output_file.name}")
+
+def process_pdfs(input_dir: str, output_dir: str, workers: int = 1, shard_pages: int = 50,
+                 cache: Optional[ResultCache] = None, metrics: Optional[RunMetrics] = None,
+                 use_toc: bool = True, text_backend: str = DEFAULT_TEXT_BACKEND, dedupe: bool = True,
+                 output_format: str = DEFAULT_OUTPUT_FORMAT):
+    """Process all PDFs in input directory (in a process pool when workers > 1)"""
+    extractor = PDFStructureExtractor(cache=cache, metrics=metrics, use_toc=use_toc, text_backend=text_backend,
+                                      dedupe=dedupe)
     
     input_path = Path(input_dir)
-    output_path = Path(output_dir)
-    output_path.mkdir(exist_ok=True)
+    output = OutlineOutput(extractor, output_dir, output_format)
     
     pdf_files = list(input_path.glob("*.pdf"))
     
@@ -198,31 +563,169 @@ def process_pdfs(input_dir: str, output_dir: str):
         logger.warning("No PDF files found in input directory")
         return
     
+    if workers > 1:
+        process_pdfs_parallel(extractor, pdf_files, output, workers, shard_pages)
+        return
+    
     for pdf_file in pdf_files:
         logger.info(f"Processing {pdf_file.name}")
         
         try:
-            result = extractor.extract_outline(str(pdf_file))
+            # Extract and save output
+            output.process(pdf_file)
+        
+        except Exception as e:
+            logger.error(f"Failed to process {pdf_file.name}: {str(e)}")
+
+def process_pdfs_parallel(extractor: PDFStructureExtractor, pdf_files: List[Path], output: OutlineOutput,
+                          workers: int, shard_pages: int):
+    """Process PDFs in a process pool, splitting large files into page-range shards"""
+    # Only batch mode pays for multiprocessing's import
+    from concurrent.futures import ProcessPoolExecutor
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        shards = {}  # pdf_file -> list of shard futures in page order
+        
+        for pdf_file in pdf_files:
+            logger.info(f"Processing {pdf_file.name}")
             
-            # Save output
-            output_file = output_path / f"{pdf_file.stem}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            try:
+                digest = ResultCache.file_digest(str(pdf_file)) if extractor.cache is not None else None
+                cached = extractor.cached_outline(extractor.cache_key(str(pdf_file), digest))
+                model_key = extractor.model_key(str(pdf_file), digest)
+                with fitz.open(str(pdf_file)) as doc:
+                    page_count = len(doc)
+                    bookmarked = extractor.toc_outline(doc) is not None
+            except Exception as e:
+                logger.error(f"Error processing {pdf_file}: {str(e)}")
+                cached, model_key, page_count, bookmarked = None, None, 0, False
             
-            logger.info(f"Generated {output_file.name}")
+            # Bookmarked or already parsed files never need the span-level pass, so they are not sharded
+            parsed = model_key is not None and extractor.cache.entry_path(model_key).exists()
             
-        except Exception as e:
-            logger.error(f"Failed to process {pdf_file.name}: {str(e)}")
+            if cached is not None:
+                logger.info(f"Cache hit for {pdf_file}")
+                extractor.metrics.count("cache_hits")
+                try:
+                    output.write(pdf_file, cached)
+                except Exception as e:
+                    logger.error(f"Failed to process {pdf_file.name}: {str(e)}")
+            elif page_count > shard_pages and not bookmarked and not parsed:
+                shards[pdf_file] = []
+                for start in range(0, page_count, shard_pages):
+                    stop = min(start + shard_pages, page_count)
+                    future = executor.submit(_extract_shard, extractor, str(pdf_file), start, stop)
+                    shards[pdf_file].append(future)
+                    futures[future] = pdf_file
+            else:
+                # Small (or unreadable) files run whole, with the same error handling as the sequential path
+                futures[executor.submit(_extract_outline, extractor, str(pdf_file))] = pdf_file
+        
+        pending_shards = {pdf_file: len(parts) for pdf_file, parts in shards.items()}
+        
+        for future in as_completed(futures):
+            pdf_file = futures[future]
+            
+            try:
+                error = None
+                if pdf_file not in shards:
+                    result, error, report = future.result()
+                    if report:
+                        extractor.metrics.merge(report)
+                else:
+                    pending_shards[pdf_file] -= 1
+                    if pending_shards[pdf_file]:
+                        continue
+                    
+                    # All shards are in: stitch them back together in page order
+                    try:
+                        parts = []
+                        for part in shards[pdf_file]:
+                            model, report = part.result()
+                            if report:
+                                extractor.metrics.merge(report)
+                            parts.append(model)
+                        model = DocumentModel.concat(parts)
+                        result = extractor.build_outline(model)
+                        extractor.store_model(extractor.model_key(str(pdf_file)), model, result)
+                        extractor.store_outline(extractor.cache_key(str(pdf_file)), result)
+                    except Exception as e:
+                        logger.error(f"Error processing {pdf_file}: {str(e)}")
+                        extractor.metrics.count("errors")
+                        result, error = extractor.error_result(), str(e)
+                
+                output.write(pdf_file, result, error)
+            
+            except Exception as e:
+                logger.error(f"Failed to process {pdf_file.name}: {str(e)}")
+
+def process_queue(input_dir: str, output_dir: str, queue_dir: str, cache: Optional[ResultCache] = None,
+                  metrics: Optional[RunMetrics] = None, use_toc: bool = True,
+                  text_backend: str = DEFAULT_TEXT_BACKEND, dedupe: bool = True,
+                  output_format: str = DEFAULT_OUTPUT_FORMAT) -> int:
+    """Work through a job queue shared with other nodes (see pdf_common.job_queue) until it drains.
+    Every node queues the PDFs in its input directory; already queued files are not added twice.
+    Returns the number of PDFs this node processed."""
+    extractor = PDFStructureExtractor(cache=cache, metrics=metrics, use_toc=use_toc, text_backend=text_backend,
+                                      dedupe=dedupe)
+    output = OutlineOutput(extractor, output_dir, output_format)
+    
+    queue = JobQueue(queue_dir)
+    added = queue.enqueue(sorted(Path(input_dir).glob("*.pdf")))
+    logger.info(f"Queued {added} PDFs in {queue_dir}")
+    
+    def handle(job: Job):
+        logger.info(f"Processing {job.id}")
+        output.process(Path(input_dir) / job.id)  # Nodes may mount the input at different paths
+    
+    processed = queue.run_worker(handle)
+    extractor.metrics.count("queue_jobs", processed)
+    return processed
 
 def main():
     """Main execution function"""
     input_dir = "/app/input"
     output_dir = "/app/output"
     
+    # Parallel batch mode: WORKERS=<n> (0 = all cores), SHARD_PAGES=<pages per shard>
+    workers = int(os.environ.get("WORKERS", "1")) or os.cpu_count() or 1
+    shard_pages = int(os.environ.get("SHARD_PAGES", "50"))
+    
+    # FORCE_HEURISTIC=1 ignores embedded bookmarks and always runs span-level heading detection
+    use_toc = os.environ.get("FORCE_HEURISTIC", "0") != "1"
+    
+    # Text extraction backend: TEXT_BACKEND=lite (default, skips images) or dict (PyMuPDF's full output)
+    text_backend = text_backend_from_env()
+    
+    # DEDUPE=0 keeps near-duplicate headings and running headers/footers in the outline
+    dedupe = os.environ.get("DEDUPE", "1") != "0"
+    
+    # OUTPUT_FORMAT=ndjson streams <stem>.jsonl records and lists finished files in manifest.jsonl
+    output_format = output_format_from_env()
+    
     # Ensure directories exist
     os.makedirs(output_dir, exist_ok=True)
     
-    process_pdfs(input_dir, output_dir)
+    # Run report: METRICS=json|prometheus (or DEBUG=1, which also dumps a cProfile)
+    metrics = metrics_from_env("round1a")
+    
+    # Multi-node batch mode: QUEUE_DIR=<directory shared by every node> holds the job queue
+    queue_dir = os.environ.get("QUEUE_DIR")
+    
+    # Outline cache: CACHE_DIR=<dir> (CACHE_MAX_MB bounds its size)
+    with profiled(output_dir, "round1a_profile"):
+        if queue_dir:
+            process_queue(input_dir, output_dir, queue_dir, cache=ResultCache.from_env(), metrics=metrics,
+                          use_toc=use_toc, text_backend=text_backend, dedupe=dedupe, output_format=output_format)
+        else:
+            process_pdfs(input_dir, output_dir, workers=workers, shard_pages=shard_pages,
+                         cache=ResultCache.from_env(), metrics=metrics, use_toc=use_toc, text_backend=text_backend,
+                         dedupe=dedupe, output_format=output_format)
+    
+    if not isinstance(metrics, NullMetrics):
+        report_file = metrics.write(output_dir, os.environ.get("METRICS", "json"))
+        logger.info(f"Generated {Path(report_file).name}")
 
 if __name__ == "__main__":
     main()
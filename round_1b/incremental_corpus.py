@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Incremental corpus for Round 1B
+Keeps per-document sections and term statistics so adding or removing one PDF only touches that PDF
+"""
+
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sklearn.base import clone
+from sklearn.feature_extraction.text import TfidfTransformer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from pdf_common.near_duplicates import duplicate_of
+from pdf_common.result_cache import ResultCache
+from section_index import SectionIndex
+
+logger = logging.getLogger(__name__)
+
+class CorpusDocument:
+    """One document's sections and their raw term counts"""
+    
+    def __init__(self, name: str, digest: Optional[str], sections: List[Dict], counts: csr_matrix,
+                 fingerprints: np.ndarray):
+        self.name = name
+        self.digest = digest
+        self.sections = sections
+        self.counts = counts  # Sections x term ids (term id space at the time the document was added)
+        self.fingerprints = fingerprints  # SimHash per section, for cross-document near-duplicates
+
+class TermStatistics:
+    """Corpus-wide term counts and document frequencies, enough to reproduce a full TF-IDF fit"""
+    
+    def __init__(self, intelligence):
+        self.intelligence = intelligence
+        self.analyzer = intelligence.vectorizer.build_analyzer()
+        
+        # Append-only term id space; statistics of terms no longer present drop to zero
+        self.term_index: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.term_counts = np.zeros(0, dtype=np.int64)   # Total occurrences per term id
+        self.doc_freq = np.zeros(0, dtype=np.int64)      # Sections containing each term id
+        self.n_sections = 0
+    
+    def count_terms(self, sections: List[Dict]) -> csr_matrix:
+        """Sections x term ids count matrix, adding new terms to the id space"""
+        # Tokenize with the vectorizer's own analyzer so counts match a full fit
+        rows, cols, values = [], [], []
+        for row, section in enumerate(sections):
+            for term, count in Counter(self.analyzer(self.intelligence.section_text(section))).items():
+                term_id = self.term_index.get(term)
+                if term_id is None:
+                    term_id = self.term_index[term] = len(self.terms)
+                    self.terms.append(term)
+                rows.append(row)
+                cols.append(term_id)
+                values.append(count)
+        
+        counts = csr_matrix((np.array(values, dtype=np.int64), (rows, cols)),
+                            shape=(len(sections), len(self.terms)))
+        self.grow_statistics()
+        return counts
+    
+    def grow_statistics(self):
+        """Extend the per-term arrays to cover newly seen terms"""
+        missing = len(self.terms) - len(self.term_counts)
+        if missing:
+            self.term_counts = np.concatenate([self.term_counts, np.zeros(missing, dtype=np.int64)])
+            self.doc_freq = np.concatenate([self.doc_freq, np.zeros(missing, dtype=np.int64)])
+    
+    def update_statistics(self, counts: csr_matrix, sign: int):
+        width = counts.shape[1]
+        self.term_counts[:width] += sign * np.asarray(counts.sum(axis=0)).ravel()
+        self.doc_freq[:width] += sign * np.bincount(counts.indices, minlength=width)
+        self.n_sections += sign * counts.shape[0]
+    
+    def vocabulary(self, term_counts: np.ndarray) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Selected term ids (in feature order) and the vocabulary a full TfidfVectorizer fit would pick"""
+        active = np.flatnonzero(term_counts > 0)
+        
+        # Features are ordered by term, as sklearn sorts its vocabulary
+        order = sorted(range(len(active)), key=lambda i: self.terms[active[i]])
+        active = active[order]
+        
+        # Same max_features cut as sklearn: most frequent terms, ties resolved by its argsort
+        max_features = self.intelligence.vectorizer.max_features
+        if max_features is not None and len(active) > max_features:
+            keep = np.zeros(len(active), dtype=bool)
+            keep[(-term_counts[active]).argsort()[:max_features]] = True
+            active = active[keep]
+        
+        return active, {self.terms[term_id]: i for i, term_id in enumerate(active)}
+    
+    def fitted(self, selected: np.ndarray, vocabulary: Dict[str, int], doc_freq: np.ndarray,
+               n_sections: int) -> Tuple[TfidfTransformer, Any]:
+        """Transformer for selected term counts and the matching query vectorizer, as a full fit leaves them"""
+        # IDF straight from the maintained document frequencies (smooth_idf, as TfidfTransformer)
+        idf = np.log((n_sections + 1) / (doc_freq[selected].astype(np.float64) + 1)) + 1
+        
+        transformer = TfidfTransformer(norm=self.intelligence.vectorizer.norm, smooth_idf=True)
+        transformer.idf_ = idf
+        vectorizer = clone(self.intelligence.vectorizer)
+        vectorizer.vocabulary_ = vocabulary
+        vectorizer.idf_ = idf
+        return transformer, vectorizer
+
+class IncrementalCorpus(TermStatistics):
+    """Section collection whose vocabulary and IDF statistics are updated per document"""
+    
+    def __init__(self, intelligence):
+        super().__init__(intelligence)
+        self.documents: Dict[str, CorpusDocument] = {}
+    
+    @property
+    def document_names(self) -> List[str]:
+        """Documents in processing order (by name, like process_documents)"""
+        return sorted(self.documents)
+    
+    def add_document(self, name: str, sections: List[Dict], digest: Optional[str] = None):
+        """Add (or replace) a document; cost is proportional to its own sections"""
+        if name in self.documents:
+            self.remove_document(name)
+        
+        counts = self.count_terms(sections)
+        self.update_statistics(counts, +1)
+        fingerprints = self.intelligence.section_fingerprints(sections)
+        self.documents[name] = CorpusDocument(name, digest, sections, counts, fingerprints)
+    
+    def remove_document(self, name: str):
+        """Drop a document and subtract its term statistics"""
+        document = self.documents.pop(name)
+        self.update_statistics(document.counts, -1)
+    
+    def add_pdf(self, pdf_file: Path) -> bool:
+        """Parse and add one PDF; returns False (and leaves the corpus unchanged) if it fails"""
+        logger.info(f"Processing {pdf_file.name}")
+        try:
+            sections = []
+            for section in self.intelligence.iter_document_sections(pdf_file):
+                del section["font_sizes"]
+                sections.append(section)
+            self.add_document(pdf_file.name, sections, ResultCache.file_digest(str(pdf_file)))
+            return True
+        except Exception as e:
+            logger.error(f"Error processing {pdf_file.name}: {str(e)}")
+            return False
+    
+    def sync(self, input_dir: str) -> Tuple[List[str], List[str]]:
+        """Bring the corpus in line with input_dir: (added or changed, removed) document names"""
+        pdf_files = {f.name: f for f in Path(input_dir).glob("*.pdf")}
+        
+        removed = [name for name in self.documents if name not in pdf_files]
+        for name in removed:
+            self.remove_document(name)
+        
+        added = []
+        for name, pdf_file in sorted(pdf_files.items()):
+            document = self.documents.get(name)
+            if document is None or document.digest != ResultCache.file_digest(str(pdf_file)):
+                if self.add_pdf(pdf_file):
+                    added.append(name)
+                elif document is not None:
+                    # Unreadable now: drop the stale version, as a full recompute would
+                    self.remove_document(name)
+                    removed.append(name)
+        
+        return added, removed
+    
+    def duplicate_rows(self) -> np.ndarray:
+        """Mask over all sections (in document order) of near-duplicates that collect_sections would drop"""
+        if not self.intelligence.dedupe or not self.documents:
+            return np.zeros(sum(len(d.sections) for d in self.documents.values()), dtype=bool)
+        
+        # Cheap to redo per query: fingerprints are kept, only the LSH pass runs over the corpus
+        fingerprints = np.concatenate([self.documents[name].fingerprints for name in self.document_names])
+        return duplicate_of(fingerprints) >= 0
+    
+    def sections(self) -> List[Dict]:
+        all_sections = [section for name in self.document_names for section in self.documents[name].sections]
+        return [section for section, duplicate in zip(all_sections, self.duplicate_rows()) if not duplicate]
+    
+    def tfidf(self) -> Tuple[Optional[csr_matrix], Optional[Any]]:
+        """TF-IDF matrix over all (deduplicated) sections and the fitted vectorizer, or (None, None)"""
+        width = len(self.terms)
+        counts = vstack([csr_matrix(self.documents[name].counts, shape=(self.documents[name].counts.shape[0], width))
+                         for name in self.document_names] or [csr_matrix((0, width), dtype=np.int64)]).tocsr()
+        
+        # Near-duplicate rows leave the statistics, as if they had never been collected
+        term_counts, doc_freq, n_sections = self.term_counts, self.doc_freq, self.n_sections
+        duplicates = self.duplicate_rows()
+        if duplicates.any():
+            dropped = counts[duplicates]
+            term_counts = term_counts - np.asarray(dropped.sum(axis=0)).ravel()
+            doc_freq = doc_freq - np.bincount(dropped.indices, minlength=width)
+            n_sections -= dropped.shape[0]
+            counts = counts[~duplicates]
+        
+        selected, vocabulary = self.vocabulary(term_counts)
+        if not len(selected):
+            return None, None
+        
+        transformer, vectorizer = self.fitted(selected, vocabulary, doc_freq, n_sections)
+        return transformer.transform(counts[:, selected]), vectorizer
+    
+    def rank(self, persona: str, job: str) -> Dict[str, Any]:
+        """Ranked result for the current corpus, matching process_documents on the same PDFs"""
+        if not self.documents:
+            return self.intelligence.create_empty_result(persona, job)
+        
+        sections = self.sections()
+        matrix, vectorizer = self.tfidf()
+        if matrix is not None:
+            query = vectorizer.transform([self.intelligence.query_text(persona, job)])
+            similarity = cosine_similarity(matrix, query).ravel()
+        else:
+            similarity = np.zeros(len(sections))
+        
+        lengths = np.array([len(s["content"]) for s in sections], dtype=np.float64)
+        is_heading = np.array([s.get("is_heading", False) for s in sections], dtype=bool)
+        scores = self.intelligence.combine_scores(similarity, lengths, is_heading)
+        
+        ranked_sections = []
+        for i in self.intelligence.top_k(scores, self.intelligence.candidate_count(len(scores))):
+            section = dict(sections[i], relevance_score=float(scores[i]))
+            ranked_sections.append(section)
+        
+        return self.intelligence.build_result(self.document_names, persona, job, ranked_sections)
+    
+    def write_index(self, index_dir: str) -> SectionIndex:
+        """Persist the current corpus as a SectionIndex"""
+        matrix, vectorizer = self.tfidf()
+        vocabulary = vectorizer.vocabulary_ if vectorizer is not None else {}
+        idf = vectorizer.idf_ if vectorizer is not None else np.zeros(0)
+        documents = [{"name": name, "digest": self.documents[name].digest} for name in self.document_names]
+        
+        return SectionIndex.write(index_dir, self.intelligence.sections_version, documents, self.document_names,
+                                  self.sections(), matrix, vocabulary, idf,
+                                  SectionIndex.analyzer_config(self.intelligence.vectorizer))
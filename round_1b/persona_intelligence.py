@@ -9,99 +9,269 @@ import os
 import sys
 from pathlib import Path
 import re
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 import logging
 from datetime import datetime
-import math
 
 # Core libraries
 import fitz  # PyMuPDF
 import numpy as np
-from collections import defaultdict, Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from itertools import repeat
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+if __name__ == "__main__":
+    # Run as a script from a checkout: shared helpers live in pdf_common/ at the repository root
+    # (next to this script in the container, so already importable there)
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from pdf_common.document_model import DEFAULT_TEXT_BACKEND, DocumentModel, text_backend_from_env
+from pdf_common.job_queue import Job, JobQueue
+from pdf_common.near_duplicates import duplicate_of, normalize_text, repeated_keys, simhash_fingerprints
+from pdf_common.metrics import NullMetrics, RunMetrics, debug_enabled, metrics_from_env, profiled
+from pdf_common.ndjson import Manifest, NDJSONWriter, output_format_from_env
+from pdf_common.result_cache import ResultCache
+from section_index import SectionIndex
+
+# Configure logging (DEBUG=1 for verbose output)
+logging.basicConfig(level=logging.DEBUG if debug_enabled() else logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _paragraph_scores(texts: List[str], persona_keywords: List[str], job_keywords: List[str]) -> np.ndarray:
+    """Keyword relevance of text fragments as one vectorized pass (module-level so pool workers can run it)"""
+    if not texts:
+        return np.zeros(0)
+    
+    # One lowercase buffer; newlines keep matches and words inside their fragment
+    lowered = [text.lower() for text in texts]
+    joined = "\n".join(lowered)
+    starts = np.zeros(len(lowered), dtype=np.int64)
+    np.cumsum([len(text) + 1 for text in lowered[:-1]], out=starts[1:])
+    
+    def fragment_of(positions: List[int]) -> np.ndarray:
+        return np.searchsorted(starts, np.array(positions, dtype=np.int64), side='right') - 1
+    
+    def keyword_matches(keywords: List[str]) -> np.ndarray:
+        """Per fragment, how many of the keywords occur in it"""
+        matches = np.zeros(len(lowered), dtype=np.int64)
+        for keyword in keywords:
+            hits = fragment_of([m.start() for m in re.finditer(re.escape(keyword), joined)])
+            matches[np.unique(hits)] += 1
+        return matches
+    
+    persona_matches = keyword_matches(persona_keywords)
+    job_matches = keyword_matches(job_keywords)
+    
+    # Normalize by text length (in words)
+    text_length = np.fromiter((len(text.split()) for text in lowered), dtype=np.int64, count=len(lowered))
+    score = persona_matches * 0.4 + job_matches * 0.6
+    return np.divide(score, np.sqrt(text_length), out=np.zeros(len(lowered)), where=text_length > 0)
+
 class DocumentIntelligence:
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            max_features=1000,
-            stop_words='english',
-            ngram_range=(1, 2),
-            lowercase=True
-        )
-        
+    VERSION = "3"  # Bump when section extraction output changes, to invalidate cached sections
+    
+    PARAGRAPH_CHUNK = 20000  # Paragraphs per pool task when subsection scoring runs in parallel
+    
+    def __init__(self, cache: Optional[ResultCache] = None, metrics: Optional[RunMetrics] = None,
+                 workers: int = 1, subsection_sections: int = 5, text_backend: str = DEFAULT_TEXT_BACKEND,
+                 dedupe: bool = True, stream_ranking: bool = False):
+        self.heading_font_size = 12     # Blocks with a larger average font size start a section
+        self.max_heading_length = 200   # Maximum character length for headings
+        self.top_sections = 10          # Sections in the ranked output
+        self.subsection_sections = subsection_sections  # Top sections analysed for subsections (0 = all)
+        self.workers = workers          # Processes for subsection scoring of large corpora
+        self.text_backend = text_backend  # get_text flags (see pdf_common.document_model.TEXT_BACKENDS)
+        self.dedupe = dedupe            # Drop running headers/footers and near-duplicate sections
+        self.stream_ranking = stream_ranking  # Rank in two passes with only the top sections in memory
+        self.cache = cache              # Optional on-disk section cache
+        self.metrics = metrics or NullMetrics()
+        self.result_stream: Optional[NDJSONWriter] = None  # Receives output records as build_result produces them
+        self._vectorizer = None         # Built on first use (see vectorizer)
+    
+    @property
+    def vectorizer(self):
+        """TF-IDF vectorizer; scikit-learn is only imported once scoring needs it"""
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            # No max_features cap: the query's own terms are usually too rare in the collection to survive one
+            self._vectorizer = TfidfVectorizer(
+                stop_words='english',
+                ngram_range=(1, 2),
+                lowercase=True
+            )
+        return self._vectorizer
+    
     def extract_sections(self, doc: fitz.Document, doc_name: str) -> List[Dict]:
         """Extract sections from PDF with content"""
+        return list(self.iter_sections(doc, doc_name))
+    
+    def iter_sections(self, doc: fitz.Document, doc_name: str) -> Iterator[Dict]:
+        """Yield sections page by page, as soon as each page is parsed"""
+        page_models = DocumentModel.iter_pages(doc, metrics=self.metrics, backend=self.text_backend)
+        return self.model_sections(page_models, doc_name)
+    
+    @property
+    def sections_version(self) -> str:
+        """Version of the section output, for caches and indexes built from it"""
+        return self.VERSION if self.dedupe else f"{self.VERSION}-nodedupe"
+    
+    def model_sections(self, page_models: Iterable[DocumentModel], doc_name: str) -> Iterator[Dict]:
+        """Yield the sections of each page of the shared document model"""
+        page_models = (page_model.in_reading_order() for page_model in page_models)
+        if not self.dedupe:
+            for page_model in page_models:
+                yield from self.detected_sections(int(page_model.pages[0]), self.page_blocks(page_model), doc_name)
+            return
+        
+        # Running headers/footers are only known once every page is seen. Until then each page is kept as its
+        # blocks' text and keys alone, not its full model, and its sections are split after the last page
+        pages = []
+        for page_model in page_models:
+            with self.metrics.stage("section_detection"):
+                pages.append((int(page_model.pages[0]), self.page_blocks(page_model), self.block_keys(page_model)))
+        
+        with self.metrics.stage("section_detection"):
+            repeated = repeated_keys(([key for key in keys if key is not None] for _, _, keys in pages), len(pages))
+        for page_num, blocks, keys in pages:
+            skip = {block for block, key in enumerate(keys) if key in repeated}
+            yield from self.detected_sections(page_num, blocks, doc_name, skip)
+    
+    def detected_sections(self, page_num: int, blocks: List[Tuple[str, List[float]]], doc_name: str,
+                          skip_blocks: Iterable[int] = ()) -> List[Dict]:
+        """Sections of one page, counted in the run metrics"""
+        with self.metrics.stage("section_detection"):
+            page_sections = self.block_sections(page_num, blocks, doc_name, skip_blocks)
+        self.metrics.count("sections", len(page_sections))
+        return page_sections
+    
+    def block_keys(self, page_model: DocumentModel) -> List[Optional[Tuple[str, int]]]:
+        """Per block, text with digits masked and top edge (None for blocks too long to be a running header)"""
+        lengths = page_model.spans.lengths
+        keys = []
+        for block in range(page_model.block_count):
+            start, stop = page_model.block_spans(block)
+            text = ""
+            if lengths[start:stop].sum() <= self.max_heading_length:
+                text = normalize_text(page_model.block_text(block), mask_digits=True)
+            keys.append((text, round(float(page_model.spans.bbox[start:stop, 1].min()))) if text else None)
+        return keys
+    
+    def page_blocks(self, page_model: DocumentModel) -> List[Tuple[str, List[float]]]:
+        """Text and span font sizes of each of a page's blocks"""
+        return [(page_model.block_text(block), page_model.block_sizes(block).tolist())
+                for block in range(page_model.block_count)]
+    
+    def page_sections(self, page_model: DocumentModel, doc_name: str, skip_blocks: Iterable[int] = ()) -> List[Dict]:
+        """Split one page's text blocks into sections at detected headings (leaving out skip_blocks)"""
+        return self.block_sections(int(page_model.pages[0]), self.page_blocks(page_model), doc_name, skip_blocks)
+    
+    def block_sections(self, page_num: int, blocks: List[Tuple[str, List[float]]], doc_name: str,
+                       skip_blocks: Iterable[int] = ()) -> List[Dict]:
+        """Split a page's (text, font sizes) blocks into sections at detected headings (leaving out skip_blocks)"""
         sections = []
+        current_section = {
+            "document": doc_name,
+            "page": page_num,
+            "section_title": f"Page {page_num}",
+            "content": "",
+            "font_sizes": [],
+            "is_heading": False
+        }
         
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            blocks = page.get_text("dict")
+        for block, (block_text, block_font_sizes) in enumerate(blocks):
+            if block in skip_blocks:
+                self.metrics.count("boilerplate_blocks")
+                continue
             
-            current_section = {
-                "document": doc_name,
-                "page": page_num + 1,
-                "section_title": f"Page {page_num + 1}",
-                "content": "",
-                "font_sizes": [],
-                "is_heading": False
+            # Check if this might be a section heading
+            if self.is_potential_heading(block_text, block_font_sizes):
+                # Save previous section if it has content
+                if current_section["content"].strip():
+                    sections.append(current_section)
+                
+                # Start new section
+                current_section = {
+                    "document": doc_name,
+                    "page": page_num,
+                    "section_title": block_text.strip()[:100],
+                    "content": block_text,
+                    "font_sizes": block_font_sizes,
+                    "is_heading": True
+                }
+            else:
+                current_section["content"] += block_text
+                current_section["font_sizes"].extend(block_font_sizes)
+        
+        # Add final section for the page
+        if current_section["content"].strip():
+            sections.append(current_section)
+        
+        return sections
+    
+    def iter_document_sections(self, pdf_file: Path) -> Iterator[Dict]:
+        """Sections of a PDF, from the cache when its bytes and parameters are unchanged"""
+        cache_key = model_key = None
+        if self.cache is not None:
+            digest = ResultCache.file_digest(str(pdf_file))
+            params = {
+                "heading_font_size": self.heading_font_size,
+                "max_heading_length": self.max_heading_length
             }
+            cache_key = self.cache.make_key(digest, f"round1b.sections/{self.sections_version}", params)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Cache hit for {pdf_file.name}")
+                self.metrics.count("cache_hits")
+                yield from cached
+                return
+            model_key = DocumentModel.cache_key(digest)
+        
+        sections = [] if cache_key else None
+        
+        # A document model parsed earlier (by either pipeline) skips the parse
+        model = DocumentModel.from_cache(self.cache, model_key) if model_key else None
+        if model is not None:
+            logger.info(f"Document model cache hit for {pdf_file.name}")
+            self.metrics.count("model_cache_hits")
+            for section in self.model_sections(model.page_models(), pdf_file.name):
+                sections.append(dict(section))
+                yield section
+        else:
+            pages = [] if model_key else None
+            with self.metrics.stage("open"):
+                doc = fitz.open(str(pdf_file))
+            with doc:
+                page_models = DocumentModel.iter_pages(doc, metrics=self.metrics, backend=self.text_backend)
+                if pages is not None:
+                    page_models = self.keep_pages(page_models, pages)
+                for section in self.model_sections(page_models, pdf_file.name):
+                    if sections is not None:
+                        sections.append(dict(section))
+                    yield section
             
-            for block in blocks["blocks"]:
-                if "lines" in block:
-                    block_text = ""
-                    block_font_sizes = []
-                    
-                    for line in block["lines"]:
-                        line_text = ""
-                        for span in line["spans"]:
-                            text = span["text"].strip()
-                            if text:
-                                line_text += text + " "
-                                block_font_sizes.append(span["size"])
-                        
-                        if line_text.strip():
-                            block_text += line_text + "\n"
-                    
-                    if block_text.strip():
-                        # Check if this might be a section heading
-                        if self.is_potential_heading(block_text, block_font_sizes):
-                            # Save previous section if it has content
-                            if current_section["content"].strip():
-                                sections.append(current_section.copy())
-                            
-                            # Start new section
-                            current_section = {
-                                "document": doc_name,
-                                "page": page_num + 1,
-                                "section_title": block_text.strip()[:100],
-                                "content": block_text,
-                                "font_sizes": block_font_sizes,
-                                "is_heading": True
-                            }
-                        else:
-                            current_section["content"] += block_text
-                            current_section["font_sizes"].extend(block_font_sizes)
-            
-            # Add final section for the page
-            if current_section["content"].strip():
-                sections.append(current_section)
+            if model_key:
+                DocumentModel.concat(pages).to_cache(self.cache, model_key)
         
-        return sections
+        if cache_key:
+            self.cache.put(cache_key, sections)
+    
+    def keep_pages(self, page_models: Iterable[DocumentModel], pages: List[DocumentModel]) -> Iterator[DocumentModel]:
+        """Pass page models through, keeping them for the model cache"""
+        for page_model in page_models:
+            pages.append(page_model)
+            yield page_model
+    
+    def load_sections(self, pdf_file: Path) -> List[Dict]:
+        """All sections of a PDF (see iter_document_sections)"""
+        return list(self.iter_document_sections(pdf_file))
     
     def is_potential_heading(self, text: str, font_sizes: List[float]) -> bool:
         """Check if text block is likely a heading"""
-        if not text or len(text.strip()) > 200:
+        if not text or len(text.strip()) > self.max_heading_length:
             return False
-            
+        
         # Check font size (if larger than average)
         if font_sizes:
             avg_size = np.mean(font_sizes)
-            if avg_size > 12:  # Threshold for heading font size
+            if avg_size > self.heading_font_size:  # Threshold for heading font size
                 return True
         
         # Check heading patterns
@@ -116,34 +286,70 @@ class DocumentIntelligence:
         for pattern in heading_patterns:
             if re.match(pattern, text.strip(), re.IGNORECASE):
                 return True
-                
+        
         return False
     
-    def calculate_relevance_score(self, section: Dict, persona: str, job: str) -> float:
-        """Calculate relevance score for a section"""
-        content = section["content"].lower()
-        section_title = section["section_title"].lower()
-        
-        # Create combined query from persona and job
-        query = f"{persona} {job}".lower()
-        
-        # Keyword matching score
-        persona_keywords = self.extract_keywords(persona)
-        job_keywords = self.extract_keywords(job)
-        
-        persona_score = sum(1 for keyword in persona_keywords if keyword in content or keyword in section_title)
-        job_score = sum(1 for keyword in job_keywords if keyword in content or keyword in section_title)
+    def section_text(self, section: Dict) -> str:
+        """Text a section is indexed under"""
+        return f"{section['section_title']}\n{section['content']}"
+    
+    def score_sections(self, sections: List[Dict], persona: str, job: str) -> np.ndarray:
+        """Relevance scores for all sections at once"""
+        if not sections:
+            return np.zeros(0)
+        
+        from sklearn.metrics.pairwise import cosine_similarity
+        
+        # Cosine similarity of every section to the persona/job query in one sparse product
+        try:
+            matrix = self.vectorizer.fit_transform([self.section_text(s) for s in sections])
+            query = self.vectorizer.transform([self.query_text(persona, job)])
+            similarity = cosine_similarity(matrix, query).ravel()
+        except ValueError:
+            # Empty vocabulary (e.g. nothing but stop words)
+            similarity = np.zeros(len(sections))
+        
+        lengths = np.array([len(s["content"]) for s in sections], dtype=np.float64)
+        is_heading = np.array([s.get("is_heading", False) for s in sections], dtype=bool)
+        return self.combine_scores(similarity, lengths, is_heading)
+    
+    def query_text(self, persona: str, job: str) -> str:
+        return f"{persona} {job}"
+    
+    def combine_scores(self, similarity: np.ndarray, lengths: np.ndarray, is_heading: np.ndarray,
+                       best_similarity: Optional[float] = None) -> np.ndarray:
+        """Final section scores from query similarity, content length and heading flags
+        (best_similarity is the collection's highest, when similarity only covers part of it)"""
+        # Similarity relative to the best match, so it outweighs the length and heading terms the way keyword
+        # matches did (cosine similarities over the full vocabulary are small)
+        if best_similarity is None:
+            best_similarity = float(similarity.max()) if len(similarity) else 0.0
+        if best_similarity > 0:
+            similarity = similarity / best_similarity
         
         # Length penalty (prefer substantial sections)
-        length_score = min(len(content) / 1000, 1.0)
+        length_score = np.minimum(lengths / 1000, 1.0)
         
         # Heading bonus
-        heading_bonus = 0.2 if section.get("is_heading", False) else 0
+        heading_bonus = np.where(is_heading, 0.2, 0.0)
         
         # Combine scores
-        total_score = (persona_score * 0.3 + job_score * 0.4 + length_score * 0.2 + heading_bonus)
-        
-        return total_score
+        return similarity * 0.7 + length_score * 0.2 + heading_bonus
+    
+    def top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k best scores, best first (ties keep input order, like a stable sort)"""
+        n = len(scores)
+        k = min(k, n)
+        if k == 0:
+            return np.zeros(0, dtype=np.int64)
+        
+        # Select without a full sort, then order only the k winners
+        kth_score = scores[np.argpartition(scores, n - k)[n - k]]
+        above = np.flatnonzero(scores > kth_score)
+        ties = np.flatnonzero(scores == kth_score)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+        
+        return selected[np.lexsort((selected, -scores[selected]))]
     
     def extract_keywords(self, text: str) -> List[str]:
         """Extract important keywords from text"""
@@ -157,31 +363,51 @@ class DocumentIntelligence:
         
         return list(set(keywords))
     
+    def candidate_count(self, section_count: int) -> int:
+        """How many ranked sections a result needs: the output ranking plus those analysed for subsections"""
+        if not self.subsection_sections:
+            return section_count
+        return max(self.top_sections, self.subsection_sections)
+    
     def extract_subsections(self, section: Dict, persona: str, job: str) -> List[Dict]:
         """Extract and rank subsections from a section"""
-        content = section["content"]
-        
-        # Split content into paragraphs
-        paragraphs = [p.strip() for p in content.split('\n') if p.strip() and len(p.strip()) > 50]
-        
-        subsections = []
-        for i, paragraph in enumerate(paragraphs[:5]):  # Limit to top 5 paragraphs
-            # Refine text (clean up)
-            refined_text = self.refine_text(paragraph)
-            
-            if refined_text and len(refined_text) > 30:
-                subsection = {
-                    "document": section["document"],
-                    "page_number": section["page"],
-                    "refined_text": refined_text,
-                    "relevance_score": self.calculate_text_relevance(refined_text, persona, job)
-                }
-                subsections.append(subsection)
+        return self.subsection_analysis([section], persona, job)
+    
+    def subsection_analysis(self, sections: List[Dict], persona: str, job: str,
+                            per_section: int = 3, limit: Optional[int] = None) -> List[Dict]:
+        """Best paragraphs of each section, all ranked together (ties keep section and paragraph order)"""
+        # Split content into paragraphs (first 5 substantial ones per section)
+        paragraphs = []
+        owners = []
+        for i, section in enumerate(sections):
+            section_paragraphs = [p.strip() for p in section["content"].split('\n') if len(p.strip()) > 50][:5]
+            paragraphs.extend(section_paragraphs)
+            owners.extend([i] * len(section_paragraphs))
+        
+        # Refine text (clean up) and score every paragraph in one batch
+        refined = self.refine_texts(paragraphs)
+        keep = [i for i, text in enumerate(refined) if len(text) > 30]
+        if not keep:
+            return []
+        texts = [refined[i] for i in keep]
+        owners = np.array(owners, dtype=np.int64)[keep]
+        scores = self.paragraph_scores(texts, persona, job)
+        
+        # Top paragraphs per section: group by section, best first, and keep the first few of each group
+        order = np.lexsort((-scores, owners))
+        grouped = owners[order]
+        rank = np.arange(len(order)) - np.searchsorted(grouped, grouped)
+        selected = order[rank < per_section]
         
         # Sort by relevance score
-        subsections.sort(key=lambda x: x["relevance_score"], reverse=True)
-        
-        return subsections[:3]  # Return top 3 subsections
+        selected = selected[np.lexsort((selected, -scores[selected]))][:limit]
+        
+        return [{
+            "document": sections[owners[i]]["document"],
+            "page_number": sections[owners[i]]["page"],
+            "refined_text": texts[i],
+            "relevance_score": float(scores[i])
+        } for i in selected]
     
     def refine_text(self, text: str) -> str:
         """Clean and refine text"""
@@ -198,107 +424,230 @@ class DocumentIntelligence:
         
         return text
     
+    def refine_texts(self, texts: List[str]) -> List[str]:
+        """refine_text for many single-line texts, with each substitution run once over the joined batch"""
+        if not texts:
+            return []
+        
+        # Newlines only separate the texts, so every other whitespace run collapses exactly as in refine_text
+        joined = re.sub(r'[^\S\n]+', ' ', "\n".join(texts))
+        joined = re.sub(r'[^\w\s.,!?;:()\-]', '', joined)
+        
+        refined = []
+        for text in joined.split('\n'):
+            text = text.strip()
+            if text:
+                text = text[0].upper() + text[1:] if len(text) > 1 else text.upper()
+            refined.append(text)
+        return refined
+    
     def calculate_text_relevance(self, text: str, persona: str, job: str) -> float:
         """Calculate relevance score for text fragment"""
-        text_lower = text.lower()
-        
-        # Keyword matching
+        return float(self.paragraph_scores([text], persona, job)[0])
+    
+    def paragraph_scores(self, texts: List[str], persona: str, job: str) -> np.ndarray:
+        """Keyword relevance of many text fragments, chunked across a process pool for large batches"""
         persona_keywords = self.extract_keywords(persona)
         job_keywords = self.extract_keywords(job)
         
-        persona_matches = sum(1 for keyword in persona_keywords if keyword in text_lower)
-        job_matches = sum(1 for keyword in job_keywords if keyword in text_lower)
+        chunk = self.PARAGRAPH_CHUNK
+        if self.workers <= 1 or len(texts) <= chunk:
+            return _paragraph_scores(texts, persona_keywords, job_keywords)
         
-        # Normalize by text length
-        text_length = len(text.split())
-        if text_length > 0:
-            score = (persona_matches * 0.4 + job_matches * 0.6) / math.sqrt(text_length)
-        else:
-            score = 0
+        from concurrent.futures import ProcessPoolExecutor
         
-        return score
+        chunks = [texts[i:i + chunk] for i in range(0, len(texts), chunk)]
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+            parts = executor.map(_paragraph_scores, chunks, repeat(persona_keywords), repeat(job_keywords))
+            return np.concatenate(list(parts))
     
     def process_documents(self, input_dir: str, persona: str, job: str) -> Dict[str, Any]:
         """Process all documents and extract relevant sections"""
         input_path = Path(input_dir)
-        pdf_files = list(input_path.glob("*.pdf"))
+        pdf_files = sorted(input_path.glob("*.pdf"))  # Sorted for a deterministic ranking
         
         if not pdf_files:
             logger.warning("No PDF files found in input directory")
             return self.create_empty_result(persona, job)
         
+        if self.stream_ranking:
+            return self.stream_documents(pdf_files, persona, job)
+        
+        all_sections, document_names = self.collect_sections(pdf_files)
+        return self.rank_documents(all_sections, document_names, persona, job)
+    
+    def stream_documents(self, pdf_files: List[Path], persona: str, job: str) -> Dict[str, Any]:
+        """process_documents for collections too large to hold: same result, top sections only in memory"""
+        from streaming_ranking import StreamingCorpus
+        
+        with StreamingCorpus(self) as corpus:
+            for name, sections in self.iter_collection(pdf_files):
+                corpus.add_document(name, sections)
+            return corpus.rank(persona, job)
+    
+    def rank_documents(self, all_sections: List[Dict], document_names: List[str], persona: str,
+                       job: str) -> Dict[str, Any]:
+        """Score deduplicated sections against the persona/job and build the result"""
+        # Calculate relevance scores for all sections
+        with self.metrics.stage("scoring"):
+            scores = self.score_sections(all_sections, persona, job)
+        for section, score in zip(all_sections, scores):
+            section["relevance_score"] = float(score)
+        
+        # Select top sections (and any further ones analysed for subsections)
+        ranked_sections = [all_sections[i] for i in self.top_k(scores, self.candidate_count(len(scores)))]
+        
+        return self.build_result(document_names, persona, job, ranked_sections)
+    
+    def collect_sections(self, pdf_files: List[Path]) -> Tuple[List[Dict], List[str]]:
+        """Sections of every readable PDF, and the names of those PDFs"""
         all_sections = []
         document_names = []
+        for name, sections in self.iter_collection(pdf_files):
+            all_sections.extend(sections)
+            document_names.append(name)
         
+        return self.drop_duplicates(all_sections), document_names
+    
+    def iter_collection(self, pdf_files: List[Path]) -> Iterator[Tuple[str, List[Dict]]]:
+        """Name and sections of each readable PDF, one document at a time"""
         # Process each PDF
         for pdf_file in pdf_files:
             logger.info(f"Processing {pdf_file.name}")
             
             try:
-                doc = fitz.open(str(pdf_file))
-                sections = self.extract_sections(doc, pdf_file.name)
-                all_sections.extend(sections)
-                document_names.append(pdf_file.name)
-                doc.close()
-                
+                # Font sizes are not needed past section extraction
+                sections = []
+                for section in self.iter_document_sections(pdf_file):
+                    del section["font_sizes"]
+                    sections.append(section)
+            
             except Exception as e:
                 logger.error(f"Error processing {pdf_file.name}: {str(e)}")
+                self.metrics.count("errors")
+                continue
+            
+            self.metrics.count("documents")
+            yield pdf_file.name, sections
+    
+    def drop_duplicates(self, sections: List[Dict]) -> List[Dict]:
+        """Sections without near-duplicates of earlier ones (unchanged when dedupe is off)"""
+        if not self.dedupe:
+            return sections
+        with self.metrics.stage("dedupe"):
+            duplicates = self.duplicate_sections(sections)
+        self.metrics.count("duplicate_sections", int(duplicates.sum()))
+        return [section for section, duplicate in zip(sections, duplicates) if not duplicate]
+    
+    def section_fingerprints(self, sections: List[Dict]) -> np.ndarray:
+        """SimHash fingerprints of section texts (see pdf_common.near_duplicates)"""
+        return simhash_fingerprints([self.section_text(section) for section in sections])
+    
+    def duplicate_sections(self, sections: List[Dict]) -> np.ndarray:
+        """Mask of sections that nearly repeat an earlier one (copied documents, repeated boilerplate)"""
+        return duplicate_of(self.section_fingerprints(sections)) >= 0
+    
+    def iter_result(self, document_names: List[str], persona: str, job: str,
+                    ranked_sections: List[Dict]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream the output as ("metadata", ...), ("section", ...) per extracted section, then ("subsection", ...);
+        sections are final before subsection analysis starts"""
+        yield "metadata", {
+            "input_documents": document_names,
+            "persona": persona,
+            "job_to_be_done": job,
+            "processing_timestamp": datetime.now().isoformat()
+        }
         
-        # Calculate relevance scores for all sections
-        for section in all_sections:
-            section["relevance_score"] = self.calculate_relevance_score(section, persona, job)
-        
-        # Sort sections by relevance
-        all_sections.sort(key=lambda x: x["relevance_score"], reverse=True)
-        
-        # Select top sections
-        top_sections = all_sections[:10]  # Top 10 sections
-        
-        # Build extracted sections output
-        extracted_sections = []
-        for i, section in enumerate(top_sections):
-            extracted_sections.append({
+        # Extracted sections
+        for i, section in enumerate(ranked_sections[:self.top_sections]):
+            yield "section", {
                 "document": section["document"],
                 "page_number": section["page"],
                 "section_title": section["section_title"],
                 "importance_rank": i + 1
-            })
-        
-        # Build subsection analysis
-        subsection_analysis = []
-        for section in top_sections[:5]:  # Top 5 sections for subsection analysis
-            subsections = self.extract_subsections(section, persona, job)
-            subsection_analysis.extend(subsections)
-        
-        # Sort subsections by relevance
-        subsection_analysis.sort(key=lambda x: x["relevance_score"], reverse=True)
-        
-        # Build final result
-        result = {
-            "metadata": {
-                "input_documents": document_names,
-                "persona": persona,
-                "job_to_be_done": job,
-                "processing_timestamp": datetime.now().isoformat()
-            },
-            "extracted_sections": extracted_sections,
-            "subsection_analysis": subsection_analysis[:10]  # Top 10 subsections
-        }
+            }
         
+        # Subsection analysis over the top sections (all candidates when subsection_sections is 0)
+        with self.metrics.stage("subsections"):
+            analysed = ranked_sections[:self.subsection_sections] if self.subsection_sections else ranked_sections
+            subsection_analysis = self.subsection_analysis(analysed, persona, job, limit=10)
+            self.metrics.count("subsection_sections", len(analysed))
+        for subsection in subsection_analysis[:10]:  # Top 10 subsections
+            yield "subsection", subsection
+    
+    def build_result(self, document_names: List[str], persona: str, job: str,
+                     ranked_sections: List[Dict]) -> Dict[str, Any]:
+        """Output structure for ranked sections (best first, as many as candidate_count asks for),
+        also written record by record to result_stream when one is set"""
+        result = {"metadata": {}, "extracted_sections": [], "subsection_analysis": []}
+        for kind, record in self.iter_result(document_names, persona, job, ranked_sections):
+            if self.result_stream is not None:
+                self.result_stream.write(kind, **record)
+            if kind == "metadata":
+                result["metadata"] = record
+            elif kind == "section":
+                result["extracted_sections"].append(record)
+            else:
+                result["subsection_analysis"].append(record)
         return result
     
     def create_empty_result(self, persona: str, job: str) -> Dict[str, Any]:
         """Create empty result structure"""
-        return {
-            "metadata": {
-                "input_documents": [],
-                "persona": persona,
-                "job_to_be_done": job,
-                "processing_timestamp": datetime.now().isoformat()
-            },
-            "extracted_sections": [],
-            "subsection_analysis": []
-        }
+        return self.build_result([], persona, job, [])
+
+def process_queue(intelligence: DocumentIntelligence, input_dir: str, queue_dir: str, persona: str, job: str,
+                  coordinator: bool = False) -> Optional[Dict[str, Any]]:
+    """Extract sections of the PDFs in a job queue shared with other nodes (see pdf_common.job_queue).
+    Workers store each document's sections as the job result; the coordinator also waits for the queue
+    to drain and ranks every document's sections together (IDF needs the whole collection), which gives
+    the same result as process_documents. Returns that result on the coordinator, None on workers."""
+    queue = JobQueue(queue_dir)
+    added = queue.enqueue(sorted(Path(input_dir).glob("*.pdf")))
+    logger.info(f"Queued {added} PDFs in {queue_dir}")
+    
+    def handle(queued: Job):
+        logger.info(f"Processing {queued.id}")
+        sections = []
+        # Nodes may mount the input at different paths
+        for section in intelligence.iter_document_sections(Path(input_dir) / queued.id):
+            del section["font_sizes"]
+            sections.append(section)
+        queue.write_result(queued, {"document": queued.id, "sections": sections})
+    
+    processed = queue.run_worker(handle)
+    intelligence.metrics.count("queue_jobs", processed)
+    if not coordinator:
+        return None
+    
+    queue.wait_drained()
+    for failed in queue.jobs("failed"):
+        logger.error(f"Error processing {failed.id}: gave up after {failed.attempts} attempts")
+        intelligence.metrics.count("errors")
+    
+    # By file name, the order process_documents reads them in
+    collection = ((result["document"], result["sections"]) for result in map(queue.read_result, queue.jobs("done")))
+    if intelligence.stream_ranking:
+        from streaming_ranking import StreamingCorpus
+        
+        with StreamingCorpus(intelligence) as corpus:
+            with intelligence.metrics.stage("queue_merge"):
+                for name, sections in collection:
+                    corpus.add_document(name, sections)
+                    intelligence.metrics.count("documents")
+            if not corpus.document_names:
+                return intelligence.create_empty_result(persona, job)
+            return corpus.rank(persona, job)
+    
+    with intelligence.metrics.stage("queue_merge"):
+        all_sections, document_names = [], []
+        for name, sections in collection:
+            all_sections.extend(sections)
+            document_names.append(name)
+            intelligence.metrics.count("documents")
+    
+    if not document_names:
+        return intelligence.create_empty_result(persona, job)
+    return intelligence.rank_documents(intelligence.drop_duplicates(all_sections), document_names, persona, job)
 
 def main():
     """Main execution function"""
@@ -318,28 +667,92 @@ def main():
                 persona = f.read().strip()
         else:
             persona = "General Researcher"
-            
+        
         if job_file.exists():
             with open(job_file, 'r', encoding='utf-8') as f:
                 job = f.read().strip()
         else:
             job = "Extract key information from documents"
-            
+    
     except Exception as e:
         logger.error(f"Error reading persona/job files: {str(e)}")
         persona = "General Researcher"
         job = "Extract key information from documents"
     
-    # Process documents
-    intelligence = DocumentIntelligence()
-    result = intelligence.process_documents(input_dir, persona, job)
+    # Run report: METRICS=json|prometheus (or DEBUG=1, which also dumps a cProfile)
+    metrics = metrics_from_env("round1b")
+    
+    # Subsection analysis: SUBSECTION_SECTIONS=<top sections> (0 = every section), scored by WORKERS processes
+    workers = int(os.environ.get("WORKERS", "1")) or os.cpu_count() or 1
+    subsection_sections = int(os.environ.get("SUBSECTION_SECTIONS", "5"))
+    
+    # DEDUPE=0 keeps running headers/footers and near-duplicate sections
+    dedupe = os.environ.get("DEDUPE", "1") != "0"
+    
+    # STREAM_RANKING=1 ranks in two passes, holding only the top sections in memory (for very large collections)
+    stream_ranking = os.environ.get("STREAM_RANKING", "0") == "1"
+    
+    # Process documents (CACHE_DIR=<dir> enables the section cache, bounded by CACHE_MAX_MB;
+    # TEXT_BACKEND=lite|dict picks the PyMuPDF extraction flags)
+    intelligence = DocumentIntelligence(cache=ResultCache.from_env(), metrics=metrics,
+                                        workers=workers, subsection_sections=subsection_sections,
+                                        text_backend=text_backend_from_env(), dedupe=dedupe,
+                                        stream_ranking=stream_ranking)
+    
+    # OUTPUT_FORMAT=ndjson streams challenge1b_output.jsonl records as they are ranked and adds it to manifest.jsonl
+    output_format = output_format_from_env()
+    
+    with profiled(output_dir, "round1b_profile"):
+        # Persistent section index (INDEX_DIR=<dir>): parse once, then every persona/job only scores
+        index_dir = os.environ.get("INDEX_DIR")
+        
+        # Multi-node batch mode: QUEUE_DIR=<directory shared by every node> holds the job queue;
+        # the node with QUEUE_ROLE=coordinator ranks and writes the output once every PDF is processed
+        queue_dir = os.environ.get("QUEUE_DIR")
+        coordinator = os.environ.get("QUEUE_ROLE", "worker") == "coordinator"
+        
+        # Save output (queue workers leave that to the coordinator)
+        output_file = Path(output_dir) / "challenge1b_output.json"
+        if output_format == "ndjson" and (coordinator or not queue_dir):
+            output_file = output_file.with_suffix(".jsonl")
+            intelligence.result_stream = NDJSONWriter(output_file)
+        
+        try:
+            if queue_dir:
+                result = process_queue(intelligence, input_dir, queue_dir, persona, job, coordinator=coordinator)
+            elif index_dir:
+                with metrics.stage("index_open"):
+                    index = SectionIndex.open(intelligence, input_dir, index_dir)
+                result = index.query(intelligence, persona, job)
+            else:
+                result = intelligence.process_documents(input_dir, persona, job)
+            
+            if intelligence.result_stream is not None:
+                intelligence.result_stream.write("end", status="ok", sections=len(result["extracted_sections"]),
+                                                 subsections=len(result["subsection_analysis"]))
+        finally:
+            if intelligence.result_stream is not None:
+                intelligence.result_stream.close()
+        
+        if intelligence.result_stream is not None:
+            Manifest(output_dir).add({
+                "documents": result["metadata"]["input_documents"],
+                "output": output_file.name,
+                "status": "ok",
+                "sections": len(result["extracted_sections"]),
+                "subsections": len(result["subsection_analysis"])
+            })
+        elif result is not None:
+            with metrics.stage("json_write"):
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, indent=2, ensure_ascii=False)
     
-    # Save output
-    output_file = Path(output_dir) / "challenge1b_output.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    if result is not None:
+        logger.info(f"Generated {output_file.name}")
     
-    logger.info(f"Generated {output_file.name}")
+    if not isinstance(metrics, NullMetrics):
+        report_file = metrics.write(output_dir, os.environ.get("METRICS", "json"))
+        logger.info(f"Generated {Path(report_file).name}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Persona Query Service for Adobe Hackathon Round 1B
+Long-running local HTTP server that keeps the section index warm and answers persona/job queries
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import logging
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+if __name__ == "__main__":
+    # Run as a script from a checkout: shared helpers live in pdf_common/ at the repository root
+    # (next to this script in the container, so already importable there)
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from incremental_corpus import IncrementalCorpus
+from persona_intelligence import DocumentIntelligence, ResultCache
+from section_index import SectionIndex
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+
+# Per-worker-process state: the loaded index stays warm between queries
+_worker_index: Dict[str, Tuple[DocumentIntelligence, SectionIndex]] = {}
+
+def _run_query(index_dir: str, persona: str, job: str) -> Dict[str, Any]:
+    """Worker task: score a persona/job query against an index"""
+    if index_dir not in _worker_index:
+        _worker_index.clear()  # Older generations are no longer queried
+        _worker_index[index_dir] = (DocumentIntelligence(), SectionIndex.load(index_dir))
+    intelligence, index = _worker_index[index_dir]
+    return index.query(intelligence, persona, job)
+
+def _parse_pdf(pdf_path: str) -> Tuple[str, List[Dict]]:
+    """Worker task: content digest and sections of one PDF"""
+    intelligence = DocumentIntelligence(cache=ResultCache.from_env())
+    sections = []
+    for section in intelligence.iter_document_sections(Path(pdf_path)):
+        del section["font_sizes"]
+        sections.append(section)
+    return ResultCache.file_digest(pdf_path), sections
+
+class QueryService:
+    """Asyncio HTTP front end; scoring and PDF parsing run in a process pool"""
+    
+    def __init__(self, input_dir: str, state_dir: str, workers: int = 2):
+        self.input_dir = Path(input_dir)
+        self.state_dir = Path(state_dir)
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.corpus = IncrementalCorpus(DocumentIntelligence())
+        self.generation = 0
+        self.index_dir = None
+        self.ingest_lock = None
+    
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """Parse the collection into the corpus, publish its index, then start accepting connections"""
+        self.ingest_lock = asyncio.Lock()
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Generations from an earlier run are stale
+        for stale in self.state_dir.glob("index-*"):
+            shutil.rmtree(stale, ignore_errors=True)
+        
+        # Parse concurrently in the pool, then fold documents in one at a time in file order
+        pdf_files = sorted(self.input_dir.glob("*.pdf"))
+        results = await asyncio.gather(*(self.parse(pdf_file) for pdf_file in pdf_files), return_exceptions=True)
+        for pdf_file, result in zip(pdf_files, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error processing {pdf_file.name}: {str(result)}")
+                continue
+            digest, sections = result
+            self.corpus.add_document(pdf_file.name, sections, digest)
+        await self.publish_index()
+        
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info(f"Serving {self.input_dir} on {host}:{server.sockets[0].getsockname()[1]}")
+        return server
+    
+    async def parse(self, pdf_file: Path) -> Tuple[str, List[Dict]]:
+        """Content digest and sections of a PDF, parsed in the pool"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, _parse_pdf, str(pdf_file))
+        except Exception as e:
+            raise ValueError(f"Could not parse {pdf_file.name}: {str(e)}")
+    
+    async def add_to_corpus(self, pdf_file: Path):
+        """Parse a PDF in the pool and fold it into the corpus (only its own statistics change).
+        The corpus is not thread-safe, so it is only ever changed here on the event loop thread."""
+        digest, sections = await self.parse(pdf_file)
+        self.corpus.add_document(pdf_file.name, sections, digest)
+    
+    async def publish_index(self):
+        """Write the corpus as the next index generation and point new queries at it"""
+        generation = self.generation + 1 if self.index_dir else 0
+        index_dir = str(self.state_dir / f"index-{generation}")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.corpus.write_index, index_dir)
+        
+        # Keep the previous generation for queries already dispatched against it
+        previous = self.state_dir / f"index-{self.generation - 1}"
+        self.index_dir, self.generation = index_dir, generation
+        shutil.rmtree(previous, ignore_errors=True)
+    
+    def close(self):
+        self.executor.shutdown(wait=True)
+    
+    async def query(self, persona: str, job: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _run_query, self.index_dir, persona, job)
+    
+    async def ingest(self, pdf_path: str) -> Dict[str, Any]:
+        """Add a PDF to the collection and swap in a rebuilt index; queries keep running meanwhile"""
+        source = Path(pdf_path)
+        if source.suffix.lower() != ".pdf" or not source.is_file():
+            raise ValueError(f"Not a PDF file: {pdf_path}")
+        
+        async with self.ingest_lock:
+            target = self.input_dir / source.name
+            if source.resolve() != target.resolve():
+                shutil.copyfile(source, target)
+            
+            await self.add_to_corpus(target)
+            await self.publish_index()
+        
+        return {"document": source.name, "generation": self.generation}
+    
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "generation": self.generation,
+            "documents": self.corpus.document_names
+        }
+    
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP/1.1 request per connection"""
+        try:
+            method, path, body = await self.read_request(reader)
+            status, payload = await self.dispatch(method, path, body)
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Error handling request: {str(e)}")
+            status, payload = 500, {"error": str(e)}
+        
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status} {http.client.responses.get(status, '')}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode('ascii') + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+    
+    async def read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Optional[Dict]]:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) < 2:
+            raise ValueError("Malformed request line")
+        method, path = request_line[0].upper(), request_line[1]
+        
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        
+        length = int(headers.get("content-length", "0"))
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        body = json.loads(await reader.readexactly(length)) if length else None
+        return method, path, body
+    
+    async def dispatch(self, method: str, path: str, body: Optional[Dict]) -> Tuple[int, Dict[str, Any]]:
+        if method == "GET" and path == "/health":
+            return 200, self.health()
+        if method == "POST" and path == "/query":
+            if not body or "persona" not in body or "job" not in body:
+                raise ValueError("Expected JSON body with 'persona' and 'job'")
+            return 200, await self.query(str(body["persona"]), str(body["job"]))
+        if method == "POST" and path == "/ingest":
+            if not body or "path" not in body:
+                raise ValueError("Expected JSON body with 'path'")
+            return 200, await self.ingest(str(body["path"]))
+        return 404, {"error": f"No route for {method} {path}"}
+
+class QueryClient:
+    """Minimal local client for the query service"""
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, timeout: float = 300.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+    
+    def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Dict[str, Any]:
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            body = json.dumps(payload).encode('utf-8') if payload is not None else None
+            headers = {"Content-Type": "application/json"} if body else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            result = json.loads(response.read())
+            if response.status != 200:
+                raise RuntimeError(f"{response.status}: {result.get('error')}")
+            return result
+        finally:
+            connection.close()
+    
+    def health(self) -> Dict[str, Any]:
+        return self.request("GET", "/health")
+    
+    def query(self, persona: str, job: str) -> Dict[str, Any]:
+        return self.request("POST", "/query", {"persona": persona, "job": job})
+    
+    def ingest(self, pdf_path: str) -> Dict[str, Any]:
+        return self.request("POST", "/ingest", {"path": pdf_path})
+
+async def serve(input_dir: str, state_dir: str, host: str, port: int, workers: int):
+    service = QueryService(input_dir, state_dir, workers)
+    try:
+        server = await service.start(host, port)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main():
+    """Command line: serve, or act as a client of a running service"""
+    parser = argparse.ArgumentParser(description="Round 1B persona query service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    serve_parser = commands.add_parser("serve", help="Run the service")
+    serve_parser.add_argument("--input", default="/app/input")
+    serve_parser.add_argument("--state", default="/app/state", help="Directory for index generations")
+    serve_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    
+    query_parser = commands.add_parser("query", help="Send a persona/job query")
+    query_parser.add_argument("--persona", required=True)
+    query_parser.add_argument("--job", required=True)
+    
+    ingest_parser = commands.add_parser("ingest", help="Add a PDF to the served collection")
+    ingest_parser.add_argument("path")
+    
+    commands.add_parser("health", help="Show service status")
+    
+    args = parser.parse_args()
+    
+    if args.command == "serve":
+        asyncio.run(serve(args.input, args.state, args.host, args.port, args.workers))
+        return
+    
+    client = QueryClient(args.host, args.port)
+    if args.command == "query":
+        result = client.query(args.persona, args.job)
+    elif args.command == "ingest":
+        result = client.ingest(args.path)
+    else:
+        result = client.health()
+    json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+if __name__ == "__main__":
+    main()
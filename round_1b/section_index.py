@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Persistent section index for Round 1B
+Built once per document collection, so each new persona/job query only loads and scores
+(with NumPy alone: SciPy and scikit-learn are only imported to build an index)
+"""
+
+import json
+import logging
+import math
+import re
+import os
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+from pdf_common.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+class SectionIndex:
+    """Sections, TF-IDF vocabulary/IDF and memory-mapped TF-IDF matrix of one document collection"""
+    
+    FORMAT = 3  # Bump when the on-disk layout or the vectorizer settings change
+    
+    def __init__(self, index_dir: Path, manifest: Dict[str, Any], sections: List[Dict],
+                 matrix_arrays: Dict[str, np.ndarray], lengths: np.ndarray, is_heading: np.ndarray,
+                 content: np.ndarray, content_offsets: np.ndarray):
+        self.index_dir = index_dir
+        self.manifest = manifest
+        self.sections = sections                # document, page, section_title per section
+        self.matrix_arrays = matrix_arrays      # CSR data/indices/indptr of the TF-IDF rows, one per section
+        self.lengths = lengths                  # Content length (characters) per section
+        self.is_heading = is_heading
+        self.content = content                  # UTF-8 contents, packed
+        self.content_offsets = content_offsets  # Byte offsets into content, n + 1 entries
+    
+    @staticmethod
+    def fingerprint(pdf_files: List[Path]) -> List[Dict[str, str]]:
+        """Names and content digests identifying a document collection"""
+        return [{"name": f.name, "digest": ResultCache.file_digest(str(f))} for f in pdf_files]
+    
+    @classmethod
+    def open(cls, intelligence, input_dir: str, index_dir: str) -> "SectionIndex":
+        """Index for the PDFs in input_dir, rebuilt only when documents or versions changed"""
+        pdf_files = sorted(Path(input_dir).glob("*.pdf"))
+        manifest_file = Path(index_dir) / "manifest.json"
+        
+        if manifest_file.exists():
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if (manifest.get("format") == cls.FORMAT and manifest.get("version") == intelligence.sections_version
+                    and manifest.get("documents") == cls.fingerprint(pdf_files)):
+                logger.info(f"Using section index in {index_dir}")
+                return cls.load(index_dir)
+        
+        logger.info(f"Building section index in {index_dir}")
+        return cls.build(intelligence, pdf_files, index_dir)
+    
+    @staticmethod
+    def analyzer_config(vectorizer) -> Optional[Dict[str, Any]]:
+        """What scoring a query needs from a TfidfVectorizer, or None if scores must go through scikit-learn"""
+        params = vectorizer.get_params()
+        if (params["analyzer"] != "word" or params["preprocessor"] is not None or params["tokenizer"] is not None
+                or params["strip_accents"] is not None or params["binary"] or not params["use_idf"]
+                or params["sublinear_tf"] or params["norm"] != "l2" or re.compile(params["token_pattern"]).groups):
+            return None
+        return {
+            "lowercase": params["lowercase"],
+            "token_pattern": params["token_pattern"],
+            "stop_words": sorted(vectorizer.get_stop_words() or ()),
+            "ngram_range": list(params["ngram_range"])
+        }
+    
+    @classmethod
+    def build(cls, intelligence, pdf_files: List[Path], index_dir: str) -> "SectionIndex":
+        """Parse the PDFs once and persist everything a query needs"""
+        from sklearn.base import clone
+        
+        sections, document_names = intelligence.collect_sections(pdf_files)
+        
+        vectorizer = clone(intelligence.vectorizer)
+        try:
+            matrix = vectorizer.fit_transform([intelligence.section_text(s) for s in sections])
+            vocabulary, idf = vectorizer.vocabulary_, vectorizer.idf_
+        except ValueError:
+            # Empty vocabulary (e.g. nothing but stop words, or no sections at all)
+            matrix, vocabulary, idf = None, {}, np.zeros(0)
+        
+        return cls.write(index_dir, intelligence.sections_version, cls.fingerprint(pdf_files), document_names,
+                         sections, matrix, vocabulary, idf, cls.analyzer_config(intelligence.vectorizer))
+    
+    @classmethod
+    def write(cls, index_dir: str, version: str, documents: List[Dict[str, str]], document_names: List[str],
+              sections: List[Dict], matrix: Optional["csr_matrix"], vocabulary: Dict[str, int],
+              idf: np.ndarray, analyzer: Optional[Dict[str, Any]] = None) -> "SectionIndex":
+        """Persist sections and their fitted TF-IDF representation (matrix None: empty vocabulary)"""
+        from scipy.sparse import csr_matrix
+        
+        matrix = csr_matrix(matrix) if matrix is not None else csr_matrix((len(sections), 0))
+        
+        # Write to a scratch directory, then swap it in
+        index_path = Path(index_dir)
+        scratch = index_path.with_name(f"{index_path.name}.tmp-{os.getpid()}")
+        shutil.rmtree(scratch, ignore_errors=True)
+        scratch.mkdir(parents=True)
+        
+        np.save(scratch / "idf.npy", idf)
+        np.save(scratch / "matrix_data.npy", matrix.data)
+        np.save(scratch / "matrix_indices.npy", matrix.indices)
+        np.save(scratch / "matrix_indptr.npy", matrix.indptr)
+        np.save(scratch / "lengths.npy", np.array([len(s["content"]) for s in sections], dtype=np.float64))
+        np.save(scratch / "is_heading.npy", np.array([s.get("is_heading", False) for s in sections], dtype=bool))
+        
+        encoded = [s["content"].encode('utf-8') for s in sections]
+        np.save(scratch / "content_offsets.npy", np.cumsum([0] + [len(b) for b in encoded], dtype=np.int64))
+        with open(scratch / "content.bin", 'wb') as f:
+            f.write(b"".join(encoded))
+        
+        with open(scratch / "sections.json", 'w', encoding='utf-8') as f:
+            json.dump([{"document": s["document"], "page": s["page"], "section_title": s["section_title"]}
+                       for s in sections], f, ensure_ascii=False)
+        
+        manifest = {
+            "format": cls.FORMAT,
+            "version": version,
+            "documents": documents,
+            "input_documents": document_names,
+            "n_features": matrix.shape[1],
+            "vocabulary": {term: int(i) for term, i in vocabulary.items()},
+            "analyzer": analyzer
+        }
+        with open(scratch / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        
+        shutil.rmtree(index_path, ignore_errors=True)
+        os.replace(scratch, index_path)
+        
+        return cls.load(index_dir)
+    
+    @classmethod
+    def load(cls, index_dir: str) -> "SectionIndex":
+        """Open an index; the large arrays are memory-mapped, not read"""
+        index_path = Path(index_dir)
+        
+        with open(index_path / "manifest.json", 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        with open(index_path / "sections.json", 'r', encoding='utf-8') as f:
+            sections = json.load(f)
+        
+        def mapped(name: str) -> np.ndarray:
+            return np.load(index_path / f"{name}.npy", mmap_mode='r')
+        
+        matrix_arrays = {name: mapped(f"matrix_{name}") for name in ("data", "indices", "indptr")}
+        
+        content_file = index_path / "content.bin"
+        if content_file.stat().st_size:
+            content = np.memmap(content_file, dtype=np.uint8, mode='r')
+        else:
+            content = np.zeros(0, dtype=np.uint8)
+        
+        return cls(index_path, manifest, sections, matrix_arrays, mapped("lengths"), mapped("is_heading"),
+                   content, mapped("content_offsets"))
+    
+    def section(self, i: int) -> Dict:
+        """Full section i, content included"""
+        start, stop = self.content_offsets[i], self.content_offsets[i + 1]
+        return dict(self.sections[i], content=self.content[start:stop].tobytes().decode('utf-8'),
+                    is_heading=bool(self.is_heading[i]))
+    
+    @property
+    def matrix(self) -> "csr_matrix":
+        """TF-IDF rows as a SciPy sparse matrix (memory-mapped)"""
+        from scipy.sparse import csr_matrix
+        
+        arrays = self.matrix_arrays
+        return csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]),
+                          shape=(len(self.sections), self.manifest["n_features"]))
+    
+    def query_terms(self, text: str) -> List[str]:
+        """Word n-grams of a query, as the fitted TfidfVectorizer's analyzer produces them"""
+        analyzer = self.manifest["analyzer"]
+        if analyzer["lowercase"]:
+            text = text.lower()
+        stop_words = set(analyzer["stop_words"])
+        tokens = [token for token in re.findall(analyzer["token_pattern"], text) if token not in stop_words]
+        
+        min_n, max_n = analyzer["ngram_range"]
+        return [" ".join(tokens[i:i + n]) for n in range(min_n, max_n + 1) for i in range(len(tokens) - n + 1)]
+    
+    def query_similarity(self, text: str) -> np.ndarray:
+        """Cosine similarity of every section to a query: one pass over the CSR arrays, no SciPy"""
+        vocabulary = self.manifest["vocabulary"]
+        counts = Counter(vocabulary[term] for term in self.query_terms(text) if term in vocabulary)
+        
+        # L2-normalized TF-IDF query vector (section rows are normalized already)
+        query = np.zeros(self.manifest["n_features"])
+        features = np.array(sorted(counts), dtype=np.int64)
+        if len(features):
+            idf = np.load(self.index_dir / "idf.npy", mmap_mode='r')
+            weights = np.array([counts[f] for f in features], dtype=np.float64) * idf[features]
+            query[features] = weights / math.sqrt(np.dot(weights, weights))
+        
+        arrays = self.matrix_arrays
+        rows = np.repeat(np.arange(len(self.sections)), np.diff(arrays["indptr"]))
+        return np.bincount(rows, weights=arrays["data"] * query[arrays["indices"]], minlength=len(self.sections))
+    
+    def scores(self, intelligence, persona: str, job: str) -> np.ndarray:
+        """Relevance scores of every section for a persona/job query"""
+        if not self.manifest["n_features"]:
+            similarity = np.zeros(len(self.sections))
+        elif self.manifest["analyzer"] is not None:
+            similarity = self.query_similarity(intelligence.query_text(persona, job))
+        else:
+            from sklearn.base import clone
+            from sklearn.metrics.pairwise import cosine_similarity
+            
+            vectorizer = clone(intelligence.vectorizer)
+            vectorizer.vocabulary_ = self.manifest["vocabulary"]
+            vectorizer.idf_ = np.load(self.index_dir / "idf.npy")
+            query = vectorizer.transform([intelligence.query_text(persona, job)])
+            similarity = cosine_similarity(self.matrix, query).ravel()
+        
+        return intelligence.combine_scores(similarity, np.asarray(self.lengths), np.asarray(self.is_heading))
+    
+    def query(self, intelligence, persona: str, job: str) -> Dict[str, Any]:
+        """Ranked result for a persona/job query, same as a full process_documents run"""
+        with intelligence.metrics.stage("scoring"):
+            scores = self.scores(intelligence, persona, job)
+        ranked_sections = []
+        for i in intelligence.top_k(scores, intelligence.candidate_count(len(scores))):
+            section = self.section(i)
+            section["relevance_score"] = float(scores[i])
+            ranked_sections.append(section)
+        
+        return intelligence.build_result(self.manifest["input_documents"], persona, job, ranked_sections)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Streaming section ranking for Round 1B
+Collections larger than memory are ranked in two passes. The first keeps only term statistics and spills each
+document's sections to a temporary file; the second scores them a document at a time against the collection's
+IDF (reading the spill twice, as scores are relative to the best similarity) and keeps a bounded heap of the best,
+so only the top-k sections (with their content) stay in memory.
+"""
+
+import heapq
+import logging
+import pickle
+import tempfile
+from typing import Any, Dict, List
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.metrics.pairwise import cosine_similarity
+
+from pdf_common.near_duplicates import SimHashIndex
+from incremental_corpus import TermStatistics
+
+logger = logging.getLogger(__name__)
+
+class StreamingCorpus(TermStatistics):
+    """Documents added in processing order; ranks them like process_documents without holding their sections"""
+    
+    def __init__(self, intelligence):
+        super().__init__(intelligence)
+        self.document_names: List[str] = []
+        self.duplicates = SimHashIndex()  # Sections kept so far, for near-duplicates across documents
+        self.spill = tempfile.TemporaryFile(prefix="round1b-sections-")
+    
+    def close(self):
+        self.spill.close()
+    
+    def __enter__(self) -> "StreamingCorpus":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def add_document(self, name: str, sections: List[Dict]):
+        """First pass: count the document's terms and spill its sections, keeping none of them in memory"""
+        if self.intelligence.dedupe:
+            sections = [section for section, new in zip(sections, self.new_sections(sections)) if new]
+        counts = self.count_terms(sections)
+        self.update_statistics(counts, +1)
+        pickle.dump((sections, counts), self.spill, protocol=pickle.HIGHEST_PROTOCOL)
+        self.document_names.append(name)
+    
+    def new_sections(self, sections: List[Dict]) -> List[bool]:
+        """Which sections are not near-duplicates of one kept earlier (the same calls as duplicate_of makes
+        over the whole collection, one document at a time)"""
+        new = []
+        for fingerprint in self.intelligence.section_fingerprints(sections).tolist():
+            duplicate = fingerprint != 0 and self.duplicates.query(fingerprint) is not None
+            if fingerprint != 0 and not duplicate:
+                self.duplicates.add(fingerprint)
+            new.append(not duplicate)
+        self.intelligence.metrics.count("duplicate_sections", new.count(False))
+        return new
+    
+    def rank(self, persona: str, job: str) -> Dict[str, Any]:
+        """Second pass: score the spilled sections and keep the best candidate_count of them"""
+        intelligence = self.intelligence
+        selected, vocabulary = self.vocabulary(self.term_counts)
+        query = transformer = None
+        if len(selected):
+            transformer, vectorizer = self.fitted(selected, vocabulary, self.doc_freq, self.n_sections)
+            query = vectorizer.transform([intelligence.query_text(persona, job)])
+        
+        # Similarities first: scores are relative to the best one in the whole collection (see combine_scores)
+        similarities = []
+        self.spill.seek(0)
+        with intelligence.metrics.stage("scoring"):
+            for _ in self.document_names:
+                sections, counts = pickle.load(self.spill)
+                if query is not None and sections:
+                    counts = csr_matrix(counts, shape=(counts.shape[0], len(self.terms)))[:, selected]
+                    similarities.append(cosine_similarity(transformer.transform(counts), query).ravel())
+                else:
+                    similarities.append(np.zeros(len(sections)))
+        best_similarity = max((float(s.max()) for s in similarities if len(s)), default=0.0)
+        
+        # Min-heap of (score, -position, section): the worst candidate is popped first, and among equal scores
+        # the latest one, so ties keep collection order like top_k
+        k = intelligence.candidate_count(self.n_sections)
+        heap = []
+        position = 0
+        self.spill.seek(0)
+        with intelligence.metrics.stage("scoring"):
+            for similarity in similarities:
+                sections, _ = pickle.load(self.spill)
+                if not sections:
+                    continue  # Every section a near-duplicate of an earlier document's
+                
+                lengths = np.array([len(s["content"]) for s in sections], dtype=np.float64)
+                is_heading = np.array([s.get("is_heading", False) for s in sections], dtype=bool)
+                scores = intelligence.combine_scores(similarity, lengths, is_heading, best_similarity)
+                for section, score in zip(sections, scores.tolist()):
+                    if len(heap) < k:
+                        heapq.heappush(heap, (score, -position, section))
+                    else:
+                        heapq.heappushpop(heap, (score, -position, section))
+                    position += 1
+        
+        ranked_sections = [dict(section, relevance_score=score)
+                           for score, _, section in sorted(heap, key=lambda entry: (-entry[0], -entry[1]))]
+        logger.info(f"Ranked {position} sections, {len(ranked_sections)} kept")
+        return intelligence.build_result(self.document_names, persona, job, ranked_sections)